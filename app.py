@@ -1,6 +1,8 @@
 # Python modules.
 import threading
+import io
 import typing
+import time
 import shutil
 import os
 
@@ -10,6 +12,8 @@ from tkinter import messagebox, filedialog
 
 # Personal modules.
 import game_of_life
+from generation_cache import GenerationCache
+from shared_frame import FramePublisher
 from button_menu import ButtonMenu
 from info_menu import InfoMenu
 from bitmap import Bitmap
@@ -18,6 +22,9 @@ from bitmap import Bitmap
 BITMAP_SIZE_WARNING = '{} is a large bitmap and can result in slow performance. Recommended bitmap size is 400x400 pixels or smaller.\n\nAre you sure you wish to continue?'
 TUTORIAL_IMAGE_PATH = 'gui/tutorialimage.bmp'
 
+# How many times per second the newest generation is drawn while the Game of Life is running.
+TARGET_FPS = 20
+
 class App(ctk.CTk):
     def __init__(self, title: str, size: tuple[int, int]) -> None:
         # Window setup.
@@ -35,7 +42,12 @@ class App(ctk.CTk):
 
         # Image path.
         self.image_path = TUTORIAL_IMAGE_PATH
-        self.is_running = False
+
+        # The GameRun in progress, if any.
+        self.run = None
+
+        # Checkpoints of previous runs so that long runs can be resumed.
+        self.cache = GenerationCache()
 
         # Widgets.
         self.button_menu = ButtonMenu(self)
@@ -70,45 +82,130 @@ class App(ctk.CTk):
         # Get rulestring and create a Game of Life object.
         rulestring = self.button_menu.rulestring.get()
         game = game_of_life.GameOfLife(self.image_path, rulestring)
+        game.set_planes(self.button_menu.get_plane_mask(game.byte_depth))
 
         # Warn user if the file is too large.
         volume = game.width * game.height * game.bit_depth
         if volume > 4e6:
-            confirm = messagebox.askquestion('File exceeds size threshold', BITMAP_SIZE_WARNING.format(os.path.basename(self.filename)))
+            confirm = messagebox.askquestion('File exceeds size threshold', BITMAP_SIZE_WARNING.format(os.path.basename(self.image_path)))
             # Cancel the process if the user doesn't reply with yes.
             if confirm != 'yes':
                 return
 
+        # Another program (or another window) may already be publishing under the same name.
+        publisher = None
+        if self.button_menu.publish_frames.get():
+            try:
+                publisher = FramePublisher(game)
+            except FileExistsError as error:
+                messagebox.showerror('Unable to share frames', str(error))
+                return
+            publisher.publish(game)
+
         # Disable frames in order to not mess up settings as the Game of Life is running.
         for widget in self.button_menu.winfo_children():
             widget.configure(state='disabled')
 
         # Modify run button to stop button.
-        self.button_menu.run_button.configure(text='Stop', command=self.stop_game_of_life, state='enabled')
+        self.button_menu.run_button.configure(text='Stop', command=self.stop_game_of_life, state='normal')
 
         # Get directory of current file.
         directory = os.path.dirname(__file__)
 
-        # Copy input bitmap and initialize the result.bmp file.
-        shutil.copyfile(self.image_path, directory + '/result.bmp')
+        # Copy input bitmap and initialize the result.bmp file. It holds the last generation once the run stops.
+        result_path = os.path.join(directory, 'result.bmp')
+        shutil.copyfile(self.image_path, result_path)
 
-        # Keep calculating generations of the Game of Life until the user presses
-        # the stop button or closed the browser window.
-        self.is_running = True
-        while self.is_running:
-            # Play one iteration of the Game of Life and save it to a file.
-            game.tick()
-            game.save_as('result.bmp')
-            self.bitmap.update_image('result.bmp')
+        # Compute generations in a thread as fast as possible and only draw the newest one
+        # TARGET_FPS times a second, so drawing never holds back the Game of Life.
+        self.run = GameRun(game, self.cache, result_path, publisher)
+        self.run.start()
+        self.after(1000 // TARGET_FPS, self.display_latest, self.run)
+
+    def display_latest(self, run: 'GameRun') -> None:
+        # Stop drawing once this run is over, even if another one has started since.
+        if not run.is_running:
+            return
+
+        # Draw the newest generation, skipping any that were computed since the last frame.
+        # It is handed to the canvas in memory, result.bmp is only written once the run stops.
+        generation, image = run.latest
+        if generation != run.displayed_generation:
+            self.bitmap.update_image(io.BytesIO(run.game.bitmap_bytes(image)))
+            self.info_menu.update_generations(generation)
+            run.displayed_generation = generation
+            run.displayed_count += 1
+
+        # Report computed and displayed generations per second about once a second.
+        now = time.perf_counter()
+        if now - run.rate_time >= 1:
+            elapsed = now - run.rate_time
+            self.info_menu.update_rates(run.computed_count / elapsed, run.displayed_count / elapsed)
+            run.computed_count = run.displayed_count = 0
+            run.rate_time = now
+
+        self.after(1000 // TARGET_FPS, self.display_latest, run)
 
     def stop_game_of_life(self):
-        # Enable frames in order to not mess up settings as the Game of Life is running.
+        # Wait for the compute thread to finish its generation before touching any settings.
+        if self.run is not None:
+            self.run.stop()
+            self.run.game.save_as(self.run.result_path)
+            self.run = None
+
+        # Enable frames again now that the Game of Life has stopped.
         for widget in self.button_menu.winfo_children():
-            widget.configure(state='enable')
+            widget.configure(state='normal')
 
-        # Modify run button to stop button.
-        self.button_menu.run_button.configure(text='Run', command=self.stop_game_of_life, state='enabled')
+        # Modify stop button back to run button.
+        self.button_menu.run_button.configure(text='Run', command=self.run_game_of_life, state='normal')
+
+# Everything one run of the Game of Life needs, so that nothing is shared between runs.
+class GameRun:
+    def __init__(self, game: game_of_life.GameOfLife, cache: GenerationCache, result_path: str, publisher: FramePublisher | None=None) -> None:
+        self.game = game
+        self.cache = cache
+        self.result_path = result_path
+
+        # Shares each generation with other programs, if enabled in the Export tab.
+        self.publisher = publisher
+
+        # Newest finished generation as a (generation, image) tuple, and counters for the info menu.
+        self.latest = (game.generation, game.image)
+        self.displayed_generation = game.generation
+        self.computed_count = self.displayed_count = 0
+        self.rate_time = time.perf_counter()
+
+        self.is_running = False
+        self.thread = threading.Thread(target=self.compute_generations, daemon=True)
+
+    def start(self) -> None:
+        self.is_running = True
+        self.thread.start()
+
+    # Stop computing, wait for the current generation to finish and release the engine (e.g. its worker processes).
+    def stop(self) -> None:
         self.is_running = False
+        self.thread.join()
+        self.game.engine.close()
+
+    def compute_generations(self) -> None:
+        # Keep calculating generations of the Game of Life until the user presses the stop button.
+        try:
+            while self.is_running:
+                self.game.tick()
+                self.cache.store(self.game)
+                if self.publisher is not None:
+                    self.publisher.publish(self.game)
+
+                # The image is replaced rather than modified by tick() so this tuple always holds one full generation.
+                self.latest = (self.game.generation, self.game.image)
+                self.computed_count += 1
+
+        # Remove the shared frames once the run is over.
+        finally:
+            if self.publisher is not None:
+                self.publisher.close()
 
 # Driver code.
 if __name__ == '__main__':
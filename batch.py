@@ -0,0 +1,144 @@
+# Play the same rule on a whole folder of bitmaps at once, one file per process.
+#   python cli.py batch examples/ --rulestring B36/S23 --generations 200 --output-dir results
+
+# Python modules.
+from concurrent import futures
+import glob
+import time
+import csv
+import os
+
+# Personal modules.
+import game_of_life
+
+# Each worker process already uses a core, so the single process engine is used by default.
+DEFAULT_ENGINE = 'bitplane'
+
+# Rough number of bytes of memory a game needs per byte of bitmap file
+# (the image tuple, the generation 0 copy and the engine's planes).
+MEMORY_PER_FILE_BYTE = 24
+
+# Columns of the batch report.
+REPORT_FIELDS = ('filename', 'status', 'seconds', 'generations', 'output', 'error')
+
+# Get every bitmap in a directory, or every file matching a glob pattern.
+def find_bitmaps(pattern: str) -> list[str]:
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.bmp')
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+# Play the Game of Life on one file and save the last generation. Runs in a worker process.
+def process_file(filename: str, output_dir: str, rulestring: str, generations: int, channel_bits: list[int] | None, engine: str) -> dict:
+    start = time.perf_counter()
+    output = os.path.join(output_dir, os.path.basename(filename))
+    game = None
+    try:
+        game = game_of_life.GameOfLife(filename, rulestring, engine=engine)
+        if channel_bits is not None:
+            game.set_planes(game_of_life.channel_plane_mask(channel_bits, game.byte_depth))
+        game.advance_to(generations)
+        game.save_as(output)
+
+    # One broken file shouldn't stop the rest of the batch.
+    except Exception as error:
+        return get_failed_result(filename, time.perf_counter() - start, error)
+    finally:
+        if game is not None:
+            game.engine.close()
+    return {'filename': filename, 'status': 'ok', 'seconds': time.perf_counter() - start, 'generations': game.generation, 'output': output, 'error': ''}
+
+def get_failed_result(filename: str, seconds: float, error: Exception) -> dict:
+    return {'filename': filename, 'status': 'failed', 'seconds': seconds, 'generations': 0, 'output': '', 'error': str(error) or type(error).__name__}
+
+# Play every file matching pattern in a pool of processes and return one result per file.
+# Files are started largest first so that the small ones fill in the gaps at the end.
+# A file is only started while the estimated memory of the files in progress stays under
+# max_memory bytes (one file is always allowed so that huge files still get processed).
+def run_batch(pattern: str, output_dir: str, rulestring: str=game_of_life.RULESTRINGS['Default'], generations: int=100,
+              workers: int | None=None, max_memory: int=1024 * 2**20, channel_bits: list[int] | None=None,
+              engine: str=DEFAULT_ENGINE, progress=None) -> list[dict]:
+    filenames = find_bitmaps(pattern)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Never write over the inputs.
+    if any(os.path.samefile(os.path.dirname(filename) or '.', output_dir) for filename in filenames):
+        raise ValueError('output directory must be different from the input directory')
+
+    # Every output is named after its input, so files from different folders mustn't share a name.
+    names = {}
+    for filename in filenames:
+        names.setdefault(os.path.basename(filename), []).append(filename)
+    duplicates = [paths for paths in names.values() if len(paths) > 1]
+    if duplicates:
+        raise ValueError('files with the same name would overwrite each other in the output directory: ' + '; '.join(', '.join(paths) for paths in duplicates))
+
+    # Queue of (memory estimate, filename), largest last so that pop() gets it first.
+    # Files to try again are added at the end, so they are started next.
+    pending = sorted((os.path.getsize(filename) * MEMORY_PER_FILE_BYTE, filename) for filename in filenames)
+    results = []
+
+    # Files in progress by job, as (memory estimate, filename, start time) tuples.
+    in_flight = {}
+
+    # Files that were in progress when a worker died. Any of them may have killed it, so
+    # each one is tried again on its own and only fails if it breaks the pool again.
+    retrying = set()
+
+    def finish(job: futures.Future) -> None:
+        memory, filename, start = in_flight.pop(job)
+        try:
+            results.append(job.result())
+        except futures.BrokenExecutor as error:
+            if filename not in retrying:
+                retrying.add(filename)
+                pending.append((memory, filename))
+                return
+            results.append(get_failed_result(filename, time.perf_counter() - start, error))
+        except Exception as error:
+            results.append(get_failed_result(filename, time.perf_counter() - start, error))
+        if progress is not None:
+            progress(results[-1])
+
+    # Whether the next pending file can be started next to the files in progress.
+    def can_start() -> bool:
+        if not in_flight:
+            return True
+        memory, filename = pending[-1]
+        if filename in retrying or any(name in retrying for _, name, _ in in_flight.values()):
+            return False
+        return sum(memory for memory, _, _ in in_flight.values()) + memory <= max_memory
+
+    executor = futures.ProcessPoolExecutor(workers)
+    try:
+        while pending or in_flight:
+            # Start files while there is memory to spare.
+            while pending and can_start():
+                memory, filename = pending.pop()
+                job = executor.submit(process_file, filename, output_dir, rulestring, generations, channel_bits, engine)
+                in_flight[job] = (memory, filename, time.perf_counter())
+
+            # Wait for at least one file to finish.
+            done, _ = futures.wait(in_flight, return_when=futures.FIRST_COMPLETED)
+            is_broken = any(isinstance(job.exception(), futures.BrokenExecutor) for job in done)
+            for job in done:
+                finish(job)
+
+            # A worker that dies (e.g. killed for running out of memory) breaks the whole pool and
+            # every file in progress with it. Those go back in the queue, which carries on in a new pool.
+            if is_broken:
+                for job in futures.as_completed(list(in_flight)):
+                    finish(job)
+                executor.shutdown()
+                executor = futures.ProcessPoolExecutor(workers)
+    finally:
+        executor.shutdown()
+
+    return results
+
+# Write the results of a batch to a CSV file.
+def write_report(results: list[dict], path: str) -> None:
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        for result in sorted(results, key=lambda result: result['filename']):
+            writer.writerow({**result, 'seconds': f'{result["seconds"]:.3f}'})
@@ -19,6 +19,12 @@ class ButtonMenu(ctk.CTkTabview):
         self.rulestring = ctk.StringVar(value=game_of_life.RULESTRINGS['Default'])
         self.rulestring.trace('w', self.check_entry)
 
+        # Whether to publish every generation to shared memory for other programs.
+        self.publish_frames = ctk.BooleanVar(value=False)
+
+        # Bit planes to simulate in every colour channel. Bit 7 is the most significant.
+        self.channel_bits = [ctk.BooleanVar(value=True) for _ in range(8)]
+
         # Widgets.
         self.create_widgets()
 
@@ -36,10 +42,30 @@ class ButtonMenu(ctk.CTkTabview):
         self.rule_select   = ctk.CTkComboBox(options_frame, variable=self.rulestring, border_color='green', values=game_of_life.RULESTRINGS, command=self.update_entry)
         self.invert_button = ctk.CTkButton(options_frame, text='Invert', command=self.invert_rulestring)
         self.random_button = ctk.CTkButton(options_frame, text='Random', command=self.random_rulestring)
+        planes_frame       = ctk.CTkFrame(options_frame)
+        planes_label       = ctk.CTkLabel(planes_frame, text='Bit planes')
         options_frame     .pack(expand=True, fill='both') 
         self.rule_select  .pack(fill='x', padx=3, pady=3)
         self.invert_button.pack(expand=True, fill='both', padx=3, pady=3)
         self.random_button.pack(expand=True, fill='both', padx=3, pady=3)
+        planes_frame      .pack(fill='x', padx=3, pady=3)
+        planes_label      .grid(row=0, column=0, columnspan=4)
+
+        # One checkbox per bit of a colour channel, most significant first.
+        for i, bit in enumerate(range(7, -1, -1)):
+            checkbox = ctk.CTkCheckBox(planes_frame, text=str(bit), variable=self.channel_bits[bit], width=40)
+            checkbox.grid(row=1 + i // 4, column=i % 4, padx=2, pady=2)
+
+        # Export Tab.
+        export_frame          = ctk.CTkFrame(self.tab('Export'))
+        self.publish_checkbox = ctk.CTkCheckBox(export_frame, text='Share frames with other programs', variable=self.publish_frames)
+        export_frame         .pack(expand=True, fill='both')
+        self.publish_checkbox.pack(fill='x', padx=3, pady=3)
+
+    # Get the plane mask for a pixel of byte_depth bytes from the selected channel bits.
+    def get_plane_mask(self, byte_depth: int) -> int:
+        bits = [bit for bit, var in enumerate(self.channel_bits) if var.get()]
+        return game_of_life.channel_plane_mask(bits, byte_depth)
 
     def update_entry(self, *_) -> None:
         rulestring = game_of_life.RULESTRINGS.get(self.rulestring.get())
@@ -0,0 +1,139 @@
+# Command line interface for running the Game of Life without the GUI.
+#   python cli.py run input.bmp --generations 100 --output result.bmp
+#   python cli.py run input.bmp --generations 1000 --pipe - --format y4m | ffmpeg -i - output.mp4
+#   python cli.py batch examples/ --generations 100 --output-dir results
+
+# Python modules.
+import argparse
+import sys
+import os
+
+# Personal modules.
+import game_of_life
+from generation_cache import GenerationCache
+from shared_frame import FramePublisher
+import frame_pipe
+import batch
+
+# Accept either a rulestring or the name of one, e.g. 'B36/S23' or 'HighLife'.
+def parse_rulestring(text: str) -> str:
+    return game_of_life.RULESTRINGS.get(text, text)
+
+# Parse a comma separated list of channel bits, e.g. '7,6'.
+def parse_channel_bits(text: str) -> list[int]:
+    return [int(bit) for bit in text.split(',')]
+
+def add_game_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--rulestring', type=parse_rulestring, default=game_of_life.RULESTRINGS['Default'], help='rulestring or rule name')
+    parser.add_argument('--generations', type=int, default=100, help='number of generations to play')
+    parser.add_argument('--planes', type=parse_channel_bits, help='comma separated channel bits to play, e.g. 7,6 (default: all)')
+    parser.add_argument('--engine', help='engine to use (default: fastest for this machine)')
+
+# Create a game from the parsed arguments.
+def create_game(filename: str, args: argparse.Namespace) -> game_of_life.GameOfLife:
+    game = game_of_life.GameOfLife(filename, args.rulestring, engine=args.engine)
+    if args.planes is not None:
+        game.set_planes(game_of_life.channel_plane_mask(args.planes, game.byte_depth))
+    return game
+
+def run(args: argparse.Namespace) -> None:
+    game = create_game(args.filename, args)
+    cache = GenerationCache() if args.cache else None
+
+    # Set up the outputs before playing anything, so that bad options fail straight away.
+    pipe = None
+    if args.pipe:
+        stream = sys.stdout.buffer if args.pipe == '-' else open(args.pipe, 'wb')
+        try:
+            pipe = frame_pipe.FramePipe(game, stream, args.format, args.fps, args.buffer)
+        except ValueError as error:
+            args.parser.error(str(error))
+    try:
+        publisher = FramePublisher(game, args.publish) if args.publish else None
+    except FileExistsError as error:
+        args.parser.error(str(error))
+
+    try:
+        # Skip ahead to the first generation, resuming from the cache if possible.
+        game.advance_to(args.start, cache)
+
+        for i in range(args.generations + 1):
+            if i:
+                game.tick()
+                if cache is not None:
+                    cache.store(game)
+            if publisher is not None:
+                publisher.publish(game)
+            if pipe is not None:
+                pipe.write()
+        if pipe is not None:
+            pipe.close()
+
+    # Stop early if whatever was reading the frames went away.
+    except BrokenPipeError:
+        print('The frame pipe was closed by the reader', file=sys.stderr)
+        # Point stdout at devnull so that flushing it on exit doesn't raise again.
+        if args.pipe == '-':
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+    finally:
+        if pipe is not None and args.pipe != '-':
+            try:
+                pipe.stream.close()
+            except BrokenPipeError:
+                pass
+        if publisher is not None:
+            publisher.close()
+        game.engine.close()
+
+    if args.output:
+        game.save_as(args.output)
+
+    # Keep stdout clean for piped frames.
+    print(f'Played {game.generation} generations of {args.rulestring} on {args.filename}', file=sys.stderr)
+
+def run_batch(args: argparse.Namespace) -> None:
+    def progress(result: dict) -> None:
+        print(f'{result["status"]:6}  {result["seconds"]:8.2f}s  {result["filename"]}  {result["error"]}', file=sys.stderr)
+
+    results = batch.run_batch(
+        args.pattern, args.output_dir, args.rulestring, args.generations,
+        workers=args.workers, max_memory=args.max_memory * 2**20, channel_bits=args.planes,
+        engine=args.engine or batch.DEFAULT_ENGINE, progress=progress,
+    )
+
+    report = os.path.join(args.output_dir, 'report.csv')
+    batch.write_report(results, report)
+    failed = sum(result['status'] != 'ok' for result in results)
+    print(f'Processed {len(results)} files ({failed} failed), report saved to {report}', file=sys.stderr)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Play the Game of Life on bitmap files.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='play the Game of Life on one bitmap')
+    run_parser.add_argument('filename')
+    add_game_arguments(run_parser)
+    run_parser.add_argument('--start', type=int, default=0, help='generation to start from')
+    run_parser.add_argument('--output', help='save the last generation to this bitmap')
+    run_parser.add_argument('--cache', action='store_true', help='resume from and save checkpoints to the generation cache')
+    run_parser.add_argument('--publish', metavar='NAME', help='publish every generation to this shared memory segment')
+    run_parser.add_argument('--pipe', metavar='PATH', help="stream every generation as raw frames to a named pipe or '-' for stdout")
+    run_parser.add_argument('--format', choices=frame_pipe.FORMATS, default='rgb', help='frame format for --pipe')
+    run_parser.add_argument('--fps', type=int, default=30, help='frame rate written in the Y4M header')
+    run_parser.add_argument('--buffer', type=int, default=4, help='most frames to buffer before waiting for the pipe')
+    run_parser.set_defaults(function=run, parser=run_parser)
+
+    batch_parser = commands.add_parser('batch', help='play the Game of Life on a folder of bitmaps')
+    batch_parser.add_argument('pattern', help='directory of bitmaps or glob pattern, e.g. "examples/*.bmp"')
+    add_game_arguments(batch_parser)
+    batch_parser.add_argument('--output-dir', default='results', help='folder for the last generation of every file and report.csv')
+    batch_parser.add_argument('--workers', type=int, help='number of processes (default: one per core)')
+    batch_parser.add_argument('--max-memory', type=int, default=1024, help='rough limit in MB for the files being processed at once')
+    batch_parser.set_defaults(function=run_batch)
+
+    args = parser.parse_args()
+    args.function(args)
+
+if __name__ == '__main__':
+    main()
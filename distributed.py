@@ -0,0 +1,301 @@
+# Run one Game of Life across several worker processes, on this machine or on other hosts.
+# The coordinator splits the image into horizontal bands of rows, one per worker. Every
+# generation each worker only sends its top and bottom row to the workers above and below
+# it (the halo), so the full image only travels over the network when a snapshot is asked for.
+# Messages are pickled, so anyone holding the authkey can run code on the workers. There is
+# no default key: only run workers on networks you trust and give each cluster its own secret.
+
+# Python modules.
+from multiprocessing import connection
+import multiprocessing
+import argparse
+import secrets
+import time
+import os
+
+# Personal modules.
+import engines
+import game_of_life
+
+# Environment variable holding the shared secret, used when --authkey isn't given.
+AUTHKEY_VARIABLE = 'GOL_AUTHKEY'
+
+# Addresses that can only be reached from this machine.
+LOOPBACK_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+# Connect to a listener, retrying for a while in case it is between two coordinators.
+def connect(address: tuple[str, int], authkey: bytes, timeout: float=10) -> connection.Connection:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return connection.Client(address, authkey=authkey)
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+# Serve one coordinator. Runs until the coordinator sends 'stop' or it or a neighbouring
+# worker goes away (e.g. the coordinator was stopped with Ctrl-C).
+# Returns the address that was listened on.
+def run_worker(address: tuple[str, int], authkey: bytes, ready=None) -> tuple[str, int]:
+    if not authkey:
+        raise ValueError('workers need an authkey')
+
+    listener = connection.Listener(address, authkey=authkey)
+    address = listener.address
+
+    # Let whoever started us know which port we ended up on.
+    if ready is not None:
+        ready.put(address)
+
+    connections = []
+    try:
+        coordinator = listener.accept()
+        connections.append(coordinator)
+        setup = coordinator.recv()
+        width, birth, survival = setup['width'], setup['birth'], setup['survival']
+        rows, planes, index = setup['rows'], setup['planes'], setup['index']
+        stride = width + 1
+
+        # Connect to the worker below first and then wait for the worker above. The last
+        # worker only waits, so the connections are made from the bottom up without deadlocking.
+        below = connect(setup['below'], authkey) if setup['below'] else None
+        connections.append(below)
+        above = listener.accept() if setup['has_above'] else None
+        connections.append(above)
+        listener.close()
+
+        while True:
+            message = coordinator.recv()
+
+            if message[0] == 'run':
+                step_times = []
+                for _ in range(message[1]):
+                    # Swap edge rows with the neighbouring workers. A halo can be bigger than the
+                    # socket buffers, so two workers must never both be sending to each other: the
+                    # upper worker of each pair sends first and the lower one receives first.
+                    # Even bands swap with the band below first and odd bands with the band above
+                    # first, so every pair of neighbours is swapping at the same time.
+                    top_row = {z: engines.get_band(plane, stride, 0, 1) for z, plane in planes.items()}
+                    bottom_row = {z: engines.get_band(plane, stride, rows - 1, rows) for z, plane in planes.items()}
+                    halo_above = halo_below = {}
+                    for side in (('below', 'above') if index % 2 == 0 else ('above', 'below')):
+                        if side == 'below' and below is not None:
+                            below.send(bottom_row)
+                            halo_below = below.recv()
+                        elif side == 'above' and above is not None:
+                            halo_above = above.recv()
+                            above.send(top_row)
+
+                    # Play the band with the halo rows around it and keep only the band itself.
+                    start = time.perf_counter()
+                    top = 1 if above is not None else 0
+                    total_rows = rows + top + (1 if below is not None else 0)
+                    for z, plane in planes.items():
+                        band = halo_above.get(z, 0) | plane << (top * stride) | halo_below.get(z, 0) << ((top + rows) * stride)
+                        band = engines.step_plane(band, width, total_rows, birth, survival)
+                        planes[z] = engines.get_band(band, stride, top, top + rows)
+                    step_times.append(time.perf_counter() - start)
+
+                coordinator.send(('done', step_times))
+
+            elif message[0] == 'snapshot':
+                coordinator.send(('snapshot', planes))
+
+            elif message[0] == 'stop':
+                break
+
+    # Drop this run and let serve_forever() wait for the next coordinator. The workers next
+    # to this one find their connection closed and drop the run as well.
+    except (EOFError, OSError, multiprocessing.AuthenticationError):
+        pass
+    finally:
+        listener.close()
+        for conn in connections:
+            if conn is not None:
+                conn.close()
+    return address
+
+# Start workers as processes on this machine. Returns their addresses and processes.
+# The workers keep serving after a coordinator stops, so runs on them can be rebalanced.
+def start_local_workers(count: int, authkey: bytes) -> tuple[list, list]:
+    ready = multiprocessing.Queue()
+    processes = []
+    for _ in range(count):
+        process = multiprocessing.Process(target=serve_forever, args=(('localhost', 0), authkey, ready), daemon=True)
+        process.start()
+        processes.append(process)
+    return [ready.get() for _ in range(count)], processes
+
+# Splits a GameOfLife across workers and keeps track of them.
+class Coordinator:
+    def __init__(self, game: game_of_life.GameOfLife, addresses: list, authkey: bytes, weights: list[float] | None=None) -> None:
+        if len(addresses) > game.height:
+            raise ValueError('more workers than rows in the image')
+
+        self.game = game
+        self.addresses = addresses
+        self.authkey = authkey
+
+        # Step times of every generation played by each worker.
+        self.step_times = [[] for _ in addresses]
+
+        self.connections = []
+        self.bands = []
+        self.connect(weights or [1] * len(addresses))
+
+    # Split the image into bands of rows sized by weight and send one to each worker.
+    def connect(self, weights: list[float]) -> None:
+        game = self.game
+        stride = game.width + 1
+
+        # Give every worker at least one row.
+        total = sum(weights)
+        self.bands = []
+        first = 0
+        for i, weight in enumerate(weights):
+            remaining = len(weights) - i - 1
+            last = game.height if not remaining else min(max(first + 1, first + round(game.height * weight / total)), game.height - remaining)
+            self.bands.append((first, last))
+            first = last
+
+        self.connections = [connect(address, self.authkey) for address in self.addresses]
+        planes = engines.split_planes(game, bytes(game.image))
+        for i, (conn, (first, last)) in enumerate(zip(self.connections, self.bands)):
+            conn.send({
+                'index': i,
+                'width': game.width,
+                'birth': frozenset(game.birth_values),
+                'survival': frozenset(game.survival_values),
+                'rows': last - first,
+                'planes': {z: engines.get_band(plane, stride, first, last) for z, plane in planes.items()},
+                'below': self.addresses[i + 1] if i + 1 < len(self.addresses) else None,
+                'has_above': i > 0,
+            })
+
+    # Play a number of generations. Workers run ahead as far as their neighbours let them
+    # and only report back once they are done.
+    def run(self, generations: int) -> None:
+        for conn in self.connections:
+            conn.send(('run', generations))
+        for i, conn in enumerate(self.connections):
+            _, step_times = conn.recv()
+            self.step_times[i].extend(step_times)
+        self.game.generation += generations
+
+    # Gather the bands from every worker into game.image.
+    def snapshot(self) -> None:
+        stride = self.game.width + 1
+        planes = {}
+        for conn, (first, _) in zip(self.connections, self.bands):
+            conn.send(('snapshot',))
+            _, bands = conn.recv()
+            for z, band in bands.items():
+                planes[z] = planes.get(z, 0) | band << (first * stride)
+        self.game.image = engines.join_planes(self.game, bytes(self.game.image), planes)
+
+    # Ratio between the slowest and fastest worker's mean step time since the last (re)connect.
+    def get_spread(self) -> float:
+        means = [mean for _, _, mean in self.report()]
+        if not all(means):
+            return 1
+        return max(means) / min(means)
+
+    # Mean step time per worker as (address, rows, seconds per generation) tuples.
+    def report(self) -> list[tuple]:
+        report = []
+        for address, (first, last), times in zip(self.addresses, self.bands, self.step_times):
+            mean = sum(times) / len(times) if times else 0
+            report.append((address, last - first, mean))
+        return report
+
+    # Re-split the image so that each worker gets rows in proportion to its measured speed.
+    # Workers are restarted with their new bands, so this needs workers that serve again
+    # after a stop (e.g. ones started with start_local_workers() or 'python distributed.py worker').
+    def rebalance(self, addresses: list | None=None) -> None:
+        speeds = []
+        for (_, rows, mean) in self.report():
+            speeds.append(rows / mean if mean else 1)
+
+        self.snapshot()
+        self.close()
+        if addresses is not None:
+            self.addresses = addresses
+        self.step_times = [[] for _ in self.addresses]
+        self.connect(speeds)
+
+    def close(self) -> None:
+        for conn in self.connections:
+            conn.send(('stop',))
+            conn.close()
+        self.connections = []
+
+# Serve coordinators forever, one after another on the same address.
+def serve_forever(address: tuple[str, int], authkey: bytes, ready=None) -> None:
+    while True:
+        # Only report the address once. A port picked by the system (port 0) is kept from then on.
+        address = run_worker(address, authkey, ready)
+        ready = None
+
+def parse_address(text: str) -> tuple[str, int]:
+    host, port = text.rsplit(':', 1)
+    return host, int(port)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the Game of Life across several worker processes.')
+    parser.add_argument('--authkey', default=os.environ.get(AUTHKEY_VARIABLE), help=f'shared secret between the coordinator and workers (default: ${AUTHKEY_VARIABLE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    worker_parser = commands.add_parser('worker', help='serve a coordinator')
+    worker_parser.add_argument('address', type=parse_address, help='HOST:PORT to listen on')
+
+    run_parser = commands.add_parser('run', help='coordinate a run')
+    run_parser.add_argument('filename')
+    run_parser.add_argument('output')
+    run_parser.add_argument('--rulestring', default=game_of_life.RULESTRINGS['Default'])
+    run_parser.add_argument('--generations', type=int, default=100)
+    run_parser.add_argument('--snapshot-every', type=int, default=0, help='save the image every N generations')
+    run_parser.add_argument('--chunk', type=int, default=50, help='generations between checks of the worker speeds')
+    run_parser.add_argument('--rebalance-ratio', type=float, default=1.5, help='re-split the rows when the slowest worker takes this many times longer per generation than the fastest (0 to never)')
+    workers = run_parser.add_mutually_exclusive_group(required=True)
+    workers.add_argument('--workers', type=lambda text: [parse_address(a) for a in text.split(',')], help='comma separated HOST:PORT of running workers')
+    workers.add_argument('--local', type=int, help='number of workers to start on this machine')
+
+    args = parser.parse_args()
+
+    # Workers started here can use a one-off random key, any other worker needs the shared secret.
+    if args.authkey:
+        authkey = args.authkey.encode()
+    elif args.command == 'run' and args.local:
+        authkey = secrets.token_bytes(32)
+    else:
+        parser.error(f'--authkey or ${AUTHKEY_VARIABLE} is required')
+
+    if args.command == 'worker':
+        if args.address[0] not in LOOPBACK_HOSTS and len(authkey) < 16:
+            parser.error('workers listening on other interfaces need an authkey of at least 16 characters')
+        serve_forever(args.address, authkey)
+    else:
+        addresses = args.workers or start_local_workers(args.local, authkey)[0]
+        game = game_of_life.GameOfLife(args.filename, args.rulestring, engine=engines.REFERENCE_ENGINE)
+        coordinator = Coordinator(game, addresses, authkey)
+
+        # Play in chunks so that snapshots can be taken and uneven workers rebalanced along the way.
+        chunk = args.snapshot_every or args.chunk
+        while game.generation < args.generations:
+            coordinator.run(min(chunk, args.generations - game.generation))
+            if args.snapshot_every:
+                coordinator.snapshot()
+                game.save_as(args.output)
+
+            if args.rebalance_ratio and game.generation < args.generations and coordinator.get_spread() > args.rebalance_ratio:
+                for address, rows, mean in coordinator.report():
+                    print(f'{address[0]}:{address[1]}  {rows} rows  {mean * 1000:.2f} ms/generation')
+                print('Rebalancing rows between workers')
+                coordinator.rebalance()
+
+        coordinator.snapshot()
+        game.save_as(args.output)
+        for address, rows, mean in coordinator.report():
+            print(f'{address[0]}:{address[1]}  {rows} rows  {mean * 1000:.2f} ms/generation')
+        coordinator.close()
@@ -0,0 +1,583 @@
+# Engines that compute one generation of a GameOfLife.
+# GameOfLife.tick() hands the work to an engine from the ENGINES registry. The original
+# pure Python loop is the reference engine and every other engine must give exactly the
+# same images (see check_engine()). choose_engine() times the registered engines on a
+# sample of the image and caches the fastest one.
+
+# Python modules.
+from concurrent import futures
+import functools
+import tempfile
+import random
+import json
+import math
+import os
+import time
+
+# Name of the engine every other engine is checked against.
+REFERENCE_ENGINE = 'reference'
+
+# Where calibration results are kept between runs.
+TUNING_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'engine_tuning.json')
+
+# Optional file to force an engine, e.g. {"engine": "bitplane", "params": {}}.
+ENGINE_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'engine_config.json')
+
+# Largest sample (in pixels per side) used by the calibration benchmark.
+CALIBRATION_SIZE = 256
+
+# Width, height and bit depth of the random grids used by the differential correctness check.
+# Odd, non-square sizes make sure rows, tiles and bytes don't line up with anything.
+CHECK_GRIDS = ((23, 17, 8), (17, 29, 24), (31, 13, 32))
+
+# Generations played by the differential correctness check.
+CHECK_GENERATIONS = 8
+
+# Fraction of bits set in each quarter of the rows of a check grid, so that dense,
+# sparse and nearly empty areas all take part.
+CHECK_DENSITIES = (0.05, 0.3, 0.6, 0.95)
+
+# Translation tables used to turn one bit of every byte into a string of '0' and '1'.
+BIT_TABLES = [bytes(ord('1') if n >> bit & 1 else ord('0') for n in range(256)) for bit in range(8)]
+
+# Translation table to turn a string of '0' and '1' back into bytes of 0 and 1.
+DIGIT_TABLE = bytes.maketrans(b'01', b'\x00\x01')
+
+# Dictionary of every engine by name.
+ENGINES = {}
+
+# Used as a decorator to add an engine to the registry.
+def register_engine(cls: type) -> type:
+    ENGINES[cls.name] = cls
+    return cls
+
+def create_engine(name: str, **params) -> 'Engine':
+    if name not in ENGINES:
+        raise ValueError(f'unknown engine {name!r}, choose from {", ".join(ENGINES)}')
+    return ENGINES[name](**params)
+
+# Base class for every engine.
+class Engine:
+    name = ''
+
+    # Whether choose_engine() should time this engine.
+    benchmark = True
+
+    def __init__(self, **params) -> None:
+        self.params = params
+
+    # Parameter sets tried by the calibration benchmark.
+    @classmethod
+    def candidates(cls, game) -> list[dict]:
+        return [{}]
+
+    # Replace game.image with the next generation. Frozen planes must be left untouched.
+    def tick(self, game) -> None:
+        raise NotImplementedError
+
+    # Release any resources held by the engine.
+    def close(self) -> None:
+        pass
+
+@register_engine
+class ReferenceEngine(Engine):
+    name = REFERENCE_ENGINE
+
+    # Far too slow to ever win a benchmark. Only used as a baseline and fallback.
+    benchmark = False
+
+    def tick(self, game) -> None:
+        game.reference_tick()
+
+# Split the active planes of a game into one big integer per plane.
+# Cell (x, y) is bit y * (width + 1) + x. The extra column on every row is always zero
+# so that horizontal neighbours never wrap around onto the next row.
+def split_planes(game, image: bytes) -> dict[int, int]:
+    planes = {}
+    for k, channel in enumerate(split_channels(game, image)):
+        # Plane z lives in byte (byte_depth - 1 - z // 8) at bit z % 8.
+        for bit in range(8):
+            z = (game.byte_depth - 1 - k) * 8 + bit
+            if game.planes >> z & 1:
+                # Reverse the string so that the first cell is the least significant bit.
+                planes[z] = int(channel.translate(BIT_TABLES[bit])[::-1], 2)
+    return planes
+
+# Split an image into one padded byte string per byte of a pixel.
+def split_channels(game, image: bytes) -> list[bytes]:
+    row_length = game.width * game.byte_depth
+    channels = []
+    for k in range(game.byte_depth):
+        channels.append(b''.join(image[y * row_length + k:(y + 1) * row_length:game.byte_depth] + b'\x00' for y in range(game.height)))
+    return channels
+
+# Write the planes back into an image. Bits of planes that aren't given are kept.
+def join_planes(game, image: bytes, planes: dict[int, int]) -> bytes:
+    stride = game.width + 1
+    cells = stride * game.height
+    ones = int.from_bytes(b'\x01' * cells, byteorder='big')
+
+    new_image = bytearray(len(image))
+    for k, channel in enumerate(split_channels(game, image)):
+        # Treat the whole channel as one integer where each byte is one cell.
+        # Shifting a 0/1 byte by less than 8 keeps it inside its own byte.
+        value = int.from_bytes(channel, byteorder='big')
+        for bit in range(8):
+            z = (game.byte_depth - 1 - k) * 8 + bit
+            if z in planes:
+                digits = plane_to_cells(planes[z], cells)
+                value = value & ~(ones << bit) | int.from_bytes(digits, byteorder='big') << bit
+
+        # Drop the padding column and interleave the channel back into the image.
+        channel = value.to_bytes(cells, byteorder='big')
+        new_image[k::game.byte_depth] = b''.join(channel[y * stride:y * stride + game.width] for y in range(game.height))
+    return bytes(new_image)
+
+# Count the alive neighbours of every cell of a plane at once with a bitwise adder.
+# Returns four planes holding bit 0 to 3 of each cell's count (0 to 8).
+def count_neighbours(plane: int, stride: int) -> tuple[int, int, int, int]:
+    # Each of the eight neighbours shifted onto the cell they neighbour.
+    neighbours = (
+        plane << 1, plane >> 1,
+        plane << stride, plane >> stride,
+        plane << (stride + 1), plane >> (stride + 1),
+        plane << (stride - 1), plane >> (stride - 1),
+    )
+
+    c0 = c1 = c2 = c3 = 0
+    for n in neighbours:
+        carry0 = c0 & n
+        c0 ^= n
+        carry1 = c1 & carry0
+        c1 ^= carry0
+        carry2 = c2 & carry1
+        c2 ^= carry1
+        c3 |= carry2
+    return c0, c1, c2, c3
+
+# Play one generation on a single plane of width x rows cells (see split_planes() for the layout).
+def step_plane(plane: int, width: int, rows: int, birth: frozenset, survival: frozenset) -> int:
+    stride = width + 1
+    row_mask = (1 << width) - 1
+    full_mask = 0
+    for y in range(rows):
+        full_mask |= row_mask << (y * stride)
+
+    counts = count_neighbours(plane, stride)
+
+    # Get a mask of every cell with exactly count alive neighbours.
+    def equals(count: int) -> int:
+        result = -1
+        for i, c in enumerate(counts):
+            result &= c if count >> i & 1 else ~c
+        return result
+
+    born = survive = 0
+    for count in birth:
+        born |= equals(count)
+    for count in survival:
+        survive |= equals(count)
+
+    return (plane & survive | ~plane & born) & full_mask
+
+# Turn the first cells bits of a plane into a byte string of 0 and 1, one byte per cell.
+def plane_to_cells(plane: int, cells: int) -> bytes:
+    return format(plane, 'b').zfill(cells)[-cells:][::-1].encode().translate(DIGIT_TABLE)
+
+# Engine that plays each bit plane as one big integer. Cost scales with active planes.
+@register_engine
+class BitplaneEngine(Engine):
+    name = 'bitplane'
+
+    def __init__(self, **params) -> None:
+        super().__init__(**params)
+
+        # The image this engine produced last and its planes, reused when the
+        # next tick starts from the same image.
+        self.last_image = None
+        self.last_planes = None
+
+    def tick(self, game) -> None:
+        image = bytes(game.image)
+        if game.image is self.last_image and self.last_planes.keys() == set(game.active_planes):
+            planes = self.last_planes
+        else:
+            planes = split_planes(game, image)
+
+        planes = self.step_planes(game, planes)
+        game.image = join_planes(game, image, planes)
+        self.last_image, self.last_planes = game.image, planes
+
+    def step_planes(self, game, planes: dict[int, int]) -> dict[int, int]:
+        birth, survival = frozenset(game.birth_values), frozenset(game.survival_values)
+        return {z: step_plane(plane, game.width, game.height, birth, survival) for z, plane in planes.items()}
+
+# Get the rows first..last - 1 out of a plane.
+def get_band(plane: int, stride: int, first: int, last: int) -> int:
+    return plane >> (first * stride) & (1 << ((last - first) * stride)) - 1
+
+# Play a band of rows cut out of a plane together with its halo rows.
+# The band's own rows start at row top of the slice and there are count of them.
+def step_band(band: int, width: int, rows: int, top: int, count: int, birth: frozenset, survival: frozenset) -> int:
+    band = step_plane(band, width, rows, birth, survival)
+    return get_band(band, width + 1, top, top + count)
+
+# Bitplane engine that splits every plane into horizontal tiles played by a pool of processes.
+@register_engine
+class ParallelBitplaneEngine(BitplaneEngine):
+    name = 'parallel-bitplane'
+
+    def __init__(self, workers: int=os.cpu_count() or 1, tile_rows: int=64) -> None:
+        super().__init__(workers=workers, tile_rows=tile_rows)
+        self.workers = workers
+        self.tile_rows = tile_rows
+        self.executor = None
+
+    # Candidates are timed on the calibration sample, so the tile heights are picked for it.
+    # The height of a tile is what sets the work sent per job, so one timed on the sample
+    # carries over to the whole image. A single worker is left to the bitplane engine.
+    @classmethod
+    def candidates(cls, game) -> list[dict]:
+        cores = os.cpu_count() or 1
+        if cores < 2:
+            return []
+
+        params = []
+        for workers in sorted({max(cores // 2, 2), cores}):
+            # Try one tile per worker and a few fixed tile heights.
+            tile_heights = {math.ceil(game.height / workers), min(32, game.height), min(128, game.height)}
+            params.extend({'workers': workers, 'tile_rows': rows} for rows in sorted(tile_heights))
+        return params
+
+    def step_planes(self, game, planes: dict[int, int]) -> dict[int, int]:
+        if self.executor is None:
+            self.executor = futures.ProcessPoolExecutor(self.workers)
+
+        birth, survival = frozenset(game.birth_values), frozenset(game.survival_values)
+        stride = game.width + 1
+
+        # Submit every tile of every plane.
+        jobs = {}
+        for z, plane in planes.items():
+            for first in range(0, game.height, self.tile_rows):
+                last = min(first + self.tile_rows, game.height)
+                # Only send the tile and the row above and below it to the worker.
+                top, bottom = max(first - 1, 0), min(last + 1, game.height)
+                band = get_band(plane, stride, top, bottom)
+                jobs[z, first] = self.executor.submit(step_band, band, game.width, bottom - top, first - top, last - first, birth, survival)
+
+        # Stitch the tiles back together.
+        new_planes = dict.fromkeys(planes, 0)
+        for (z, first), job in jobs.items():
+            new_planes[z] |= job.result() << (first * stride)
+        return new_planes
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+# One bit plane played by IncrementalEngine. While many cells flip every generation the plane
+# is kept as one big integer and played with step_plane(). Once few cells flip, it switches to
+# a byte per cell with neighbour counts kept up to date, and only the neighbours of cells that
+# flipped last generation are looked at.
+#
+# Cells are laid out like in split_planes() behind an extra empty row and cell, and followed
+# by an extra empty row, so cell (x, y) is index origin + y * stride + x and every neighbour
+# index is in range.
+class IncrementalPlane:
+    def __init__(self, plane: int, width: int, height: int) -> None:
+        self.width, self.height = width, height
+        self.stride = width + 1
+        self.origin = self.stride + 1
+        self.cells = (height + 2) * self.stride + 2
+
+        # Offsets from a cell index to its eight neighbours.
+        s = self.stride
+        self.offsets = (-s - 1, -s, -s + 1, -1, 1, s - 1, s, s + 1)
+
+        # Full mode state.
+        self.plane = plane
+
+        # Incremental mode state: alive cells, neighbour counts and the cells that flipped last.
+        self.state = None
+        self.counts = None
+        self.changed = None
+
+    @property
+    def is_incremental(self) -> bool:
+        return self.state is not None
+
+    # Switch to a byte per cell, counting every neighbour once from scratch.
+    def to_incremental(self, changed: list[int]) -> None:
+        padded = self.plane << self.origin
+        self.state = bytearray(plane_to_cells(padded, self.cells))
+
+        # Counts are kept for the empty border too so that flips can update them blindly.
+        total = 0
+        for i, c in enumerate(count_neighbours(padded, self.stride)):
+            total |= int.from_bytes(plane_to_cells(c, self.cells), byteorder='big') << i
+        self.counts = bytearray(total.to_bytes(self.cells, byteorder='big'))
+        self.changed = changed
+        self.plane = None
+
+    # Switch back to one big integer.
+    def to_full(self) -> None:
+        digits = self.state.translate(BIT_TABLES[0])
+        self.plane = int(digits[::-1], 2) >> self.origin
+        self.state = self.counts = self.changed = None
+
+    # Play one generation with the big integer. Returns the flipped cell indices if few enough
+    # cells flipped to switch to incremental mode, otherwise None.
+    def step_full(self, birth: frozenset, survival: frozenset, limit: int) -> list[int] | None:
+        new_plane = step_plane(self.plane, self.width, self.height, birth, survival)
+        flipped = self.plane ^ new_plane
+        self.plane = new_plane
+        if flipped.bit_count() > limit:
+            return None
+
+        # Find the index of every flipped cell, shifted past the empty border.
+        digits = format(flipped, 'b')[::-1]
+        changed = []
+        i = digits.find('1')
+        while i >= 0:
+            changed.append(i + self.origin)
+            i = digits.find('1', i + 1)
+
+        self.to_incremental(changed)
+        return changed
+
+    # Play one generation looking only at cells next to last generation's flips.
+    # Cells whose state and neighbours didn't change can't change either.
+    # Returns the flipped cell indices.
+    def step_incremental(self, rule: bytes) -> list[int]:
+        state, counts, offsets = self.state, self.counts, self.offsets
+
+        candidates = set()
+        for i in self.changed:
+            candidates.add(i)
+            candidates.update(i + offset for offset in offsets)
+
+        # Decide every flip before applying any of them.
+        flips = [i for i in candidates if self.is_inside(i) and rule[state[i] * 9 + counts[i]] != state[i]]
+
+        for i in flips:
+            state[i] ^= 1
+            step = 1 if state[i] else -1
+            for offset in offsets:
+                counts[i + offset] += step
+
+        self.changed = flips
+        return flips
+
+    # Check that a cell index isn't part of the empty border.
+    def is_inside(self, i: int) -> bool:
+        y, x = divmod(i - self.origin, self.stride)
+        return x < self.width and 0 <= y < self.height
+
+# Engine that only re-evaluates cells next to the ones that flipped last generation, so the
+# cost of a generation follows the activity instead of the image area. Planes fall back to the
+# big integer bitplane step while more than threshold of their cells flip every generation.
+@register_engine
+class IncrementalEngine(Engine):
+    name = 'incremental'
+
+    def __init__(self, threshold: float=0.05) -> None:
+        super().__init__(threshold=threshold)
+        self.threshold = threshold
+        self.last_image = None
+        self.planes = {}
+
+        # Copy of last_image that flips are applied to in place, made the first time a tick needs it.
+        self.buffer = None
+
+    @classmethod
+    def candidates(cls, game) -> list[dict]:
+        return [{'threshold': threshold} for threshold in (0.01, 0.05, 1.0)]
+
+    def tick(self, game) -> None:
+        birth, survival = frozenset(game.birth_values), frozenset(game.survival_values)
+
+        # Start over in full mode if the image wasn't produced by this engine (e.g. restored from the cache).
+        image = game.image
+        if image is not self.last_image or self.planes.keys() != set(game.active_planes):
+            image = bytes(image)
+            planes = split_planes(game, image)
+            self.planes = {z: IncrementalPlane(plane, game.width, game.height) for z, plane in planes.items()}
+            self.buffer = None
+
+        # Next state of a cell by its state (0 or 1) and neighbour count.
+        rule = bytes([count in birth for count in range(9)] + [count in survival for count in range(9)])
+        limit = self.threshold * game.width * game.height
+
+        is_changed = False
+        full_planes = {}
+        for z, plane in self.planes.items():
+            if not plane.is_incremental:
+                changed = plane.step_full(birth, survival, limit)
+                if changed is None:
+                    full_planes[z] = plane.plane
+                    continue
+
+                # The plane switched modes; its flips still need writing into the image.
+                flips = changed
+            else:
+                flips = plane.step_incremental(rule)
+                if len(flips) > limit:
+                    plane.to_full()
+
+            if not flips:
+                continue
+            if self.buffer is None:
+                self.buffer = bytearray(image)
+
+            # Toggle the bit of every flipped cell in the image.
+            k, bit = game.byte_depth - 1 - z // 8, 1 << z % 8
+            for i in flips:
+                y, x = divmod(i - plane.origin, plane.stride)
+                self.buffer[(y * game.width + x) * game.byte_depth + k] ^= bit
+            is_changed = True
+
+        # The image handed out has to stay the same generation, so the buffer is only copied
+        # once per generation, and not at all when nothing flipped. join_planes() builds a new
+        # image anyway, and the buffer is made again from it when a later tick needs it.
+        if full_planes:
+            game.image = join_planes(game, image if self.buffer is None else self.buffer, full_planes)
+            self.buffer = None
+        elif is_changed:
+            game.image = bytes(self.buffer)
+        else:
+            game.image = image
+        self.last_image = game.image
+
+# Make the seeded random games used by the differential check, played by the reference
+# engine. Returns one (game, images) tuple per check grid, where images holds every
+# generation. Cached, since every engine is checked against the same generations.
+@functools.lru_cache(maxsize=None)
+def get_check_games(rulestring: str, seed: int, generations: int) -> tuple:
+    import game_of_life
+
+    checks = []
+    with tempfile.TemporaryDirectory() as directory:
+        for width, height, bit_depth in CHECK_GRIDS:
+            rng = random.Random(f'{seed}:{width}x{height}x{bit_depth}')
+
+            # Fill the grid with a different density of alive bits in each quarter of the rows.
+            pixels = bytearray()
+            for y in range(height):
+                density = CHECK_DENSITIES[y * len(CHECK_DENSITIES) // height]
+                for _ in range(width * bit_depth // 8):
+                    pixels.append(sum(1 << bit for bit in range(8) if rng.random() < density))
+
+            # Freeze a random set of planes, keeping at least one active.
+            planes = rng.getrandbits(bit_depth) | 1 << rng.randrange(bit_depth)
+
+            filename = os.path.join(directory, 'check.bmp')
+            game_of_life.write_bitmap(filename, width, height, bit_depth, bytes(pixels))
+            game = game_of_life.GameOfLife(filename, rulestring, planes=planes, engine=REFERENCE_ENGINE)
+
+            images = []
+            reference = game.crop(width, height)
+            for _ in range(generations):
+                reference.tick()
+                images.append(bytes(reference.image))
+            checks.append((game, images))
+    return tuple(checks)
+
+# Play seeded random grids (see CHECK_GRIDS) with the given engine and check that every
+# generation matches the reference engine. Returns True if they agree.
+def check_engine(name: str, rulestring: str, params: dict | None=None, seed: int=0, generations: int=CHECK_GENERATIONS) -> bool:
+    for game, images in get_check_games(rulestring, seed, generations):
+        sample = game.crop(game.width, game.height, engine=name, engine_params=params)
+        try:
+            for image in images:
+                sample.tick()
+                if bytes(sample.image) != image:
+                    return False
+        finally:
+            sample.engine.close()
+    return True
+
+# Get the corner of a game that engines are timed on.
+def get_calibration_sample(game):
+    return game.crop(CALIBRATION_SIZE, CALIBRATION_SIZE)
+
+# Time one engine on a sample of the game. Returns the seconds per generation.
+def time_engine(name: str, game, params: dict, repeats: int=2) -> float:
+    sample = game.crop(CALIBRATION_SIZE, CALIBRATION_SIZE, engine=name, engine_params=params)
+    try:
+        # Warm up once so that start up costs (e.g. process pools) aren't counted.
+        sample.tick()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            sample.tick()
+        return (time.perf_counter() - start) / repeats
+    finally:
+        sample.engine.close()
+
+# Key for the tuning cache. Images whose calibration samples are of a similar size and
+# the same depth share a result, so every image bigger than the sample shares one.
+def get_tuning_key(game) -> str:
+    area = min(game.width, CALIBRATION_SIZE) * min(game.height, CALIBRATION_SIZE)
+    size_class = round(math.log2(max(area, 1)))
+    return f'{size_class}:{game.bit_depth}:{os.cpu_count()}'
+
+def load_json(path: str) -> dict:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+# Time every registered engine that passes the correctness check and return the
+# fastest as a (name, params) tuple.
+def calibrate(game) -> tuple[str, dict]:
+    sample = get_calibration_sample(game)
+    best = (math.inf, REFERENCE_ENGINE, {})
+    for name, cls in ENGINES.items():
+        if not cls.benchmark:
+            continue
+
+        for params in cls.candidates(sample):
+            if not check_engine(name, game.rulestring, params):
+                continue
+            best = min(best, (time_engine(name, sample, params), name, params), key=lambda result: result[0])
+    return best[1], best[2]
+
+# Get the engine to use for a game.
+# An engine set in the config file always wins, then a cached calibration result,
+# otherwise the engines are calibrated and the result is cached.
+def choose_engine(game) -> Engine:
+    config = load_json(ENGINE_CONFIG_PATH)
+    if 'engine' in config:
+        return create_engine(config['engine'], **config.get('params', {}))
+
+    tuning = load_json(TUNING_CACHE_PATH)
+    key = get_tuning_key(game)
+    if key in tuning and tuning[key]['engine'] in ENGINES:
+        return create_engine(tuning[key]['engine'], **tuning[key]['params'])
+
+    name, params = calibrate(game)
+    tuning[key] = {'engine': name, 'params': params}
+    try:
+        with open(TUNING_CACHE_PATH, 'w') as file:
+            json.dump(tuning, file, indent=4)
+    except OSError:
+        pass
+    return create_engine(name, **params)
+
+# Run the differential check for every registered engine and built in rulestring.
+if __name__ == '__main__':
+    import sys
+    import game_of_life
+
+    failed = False
+    for rulestring in game_of_life.RULESTRINGS.values():
+        game = get_check_games(rulestring, 0, CHECK_GENERATIONS)[0][0]
+        for name, cls in ENGINES.items():
+            for params in cls.candidates(game) or [{}]:
+                if not check_engine(name, rulestring, params):
+                    print(f'{name} {params} differs from the reference for {rulestring}')
+                    failed = True
+    print('engines differ from the reference' if failed else 'all engines match the reference')
+    sys.exit(failed)
@@ -0,0 +1,132 @@
+# Stream generations as raw video frames to stdout or a named pipe, e.g. to record with ffmpeg:
+#   python cli.py run input.bmp --pipe - --format y4m | ffmpeg -i - output.mp4
+#   python cli.py run input.bmp --pipe - --format rgb | ffmpeg -f rawvideo -pixel_format rgb24 -video_size WxH -i - output.mp4
+# Frames are handed to a writer thread through a small queue. When the reader of the pipe
+# falls behind, the queue fills up and the simulation waits for it, so no more than
+# max_frames frames are ever buffered.
+
+# Python modules.
+import threading
+import queue
+
+# Personal modules.
+import game_of_life
+
+FORMATS = ('rgb', 'y4m')
+
+# Marks the end of the stream for the writer thread.
+END_OF_STREAM = None
+
+# Convert an image into top-down RGB bytes in one pass over whole rows and channels:
+# un-invert with a translation table, drop the row padding, flip the rows and reorder
+# BGR(A) into RGB with slice assignment. 8-bit images are treated as grayscale.
+def to_rgb(game: game_of_life.GameOfLife, image) -> bytes:
+    data = game.pixel_bytes(image)
+    row_length = game.width * game.byte_depth
+
+    # Bitmaps are stored bottom row first.
+    data = b''.join(data[y * row_length:(y + 1) * row_length] for y in range(game.height - 1, -1, -1))
+
+    rgb = bytearray(game.width * game.height * 3)
+    if game.byte_depth == 1:
+        rgb[0::3] = rgb[1::3] = rgb[2::3] = data
+    else:
+        # Bitmaps are stored as BGR(A). Any extra bytes (e.g. alpha) are dropped.
+        rgb[0::3] = data[2::game.byte_depth]
+        rgb[1::3] = data[1::game.byte_depth]
+        rgb[2::3] = data[0::game.byte_depth]
+    return bytes(rgb)
+
+# Get the YUV4MPEG2 stream header for a game.
+def get_y4m_header(game: game_of_life.GameOfLife, fps: int) -> bytes:
+    colour_space = 'mono' if game.byte_depth == 1 else '444'
+    # Pillow's YCbCr uses the full 0-255 range rather than the studio range players assume.
+    return f'YUV4MPEG2 W{game.width} H{game.height} F{fps}:1 Ip A1:1 C{colour_space} XCOLORRANGE=FULL\n'.encode()
+
+# Convert an image into one planar YUV 4:4:4 (or mono) Y4M frame.
+def to_y4m_frame(game: game_of_life.GameOfLife, image) -> bytes:
+    if game.byte_depth == 1:
+        return b'FRAME\n' + to_rgb(game, image)[0::3]
+
+    # Only needed for Y4M, so Pillow isn't required to stream raw RGB.
+    from PIL import Image
+
+    frame = Image.frombytes('RGB', (game.width, game.height), to_rgb(game, image)).convert('YCbCr')
+    return b'FRAME\n' + b''.join(band.tobytes() for band in frame.split())
+
+# Writes generations of one game to a binary stream.
+class FramePipe:
+    def __init__(self, game: game_of_life.GameOfLife, stream, format: str='rgb', fps: int=30, max_frames: int=4) -> None:
+        if format not in FORMATS:
+            raise ValueError(f'unknown frame format {format!r}, choose from {", ".join(FORMATS)}')
+        if max_frames < 1:
+            raise ValueError('max_frames must be at least 1')
+        # 16-bit bitmaps pack their channels into 5 or 6 bits, which to_rgb() can't split by bytes.
+        if game.byte_depth == 2:
+            raise ValueError('16-bit bitmaps can\'t be streamed, convert them to 24 or 32-bit first')
+        # Colour Y4M frames are converted by Pillow. Check for it now rather than after the header is written.
+        if format == 'y4m' and game.byte_depth > 1:
+            try:
+                import PIL.Image
+            except ImportError:
+                raise ValueError('Y4M output of colour bitmaps needs Pillow (pip install pillow)') from None
+
+        self.game = game
+        self.stream = stream
+        self.format = format
+        self.fps = fps
+
+        # Frames waiting to be written. put() blocks once it is full.
+        self.frames = queue.Queue(maxsize=max_frames)
+
+        # Error raised by the writer thread (e.g. the reader closed the pipe).
+        self.error = None
+        self.error_reported = False
+
+        self.writer = threading.Thread(target=self.write_frames, daemon=True)
+        self.writer.start()
+
+    def write_frames(self) -> None:
+        try:
+            if self.format == 'y4m':
+                self.stream.write(get_y4m_header(self.game, self.fps))
+
+            while (image := self.frames.get()) is not END_OF_STREAM:
+                if self.format == 'y4m':
+                    self.stream.write(to_y4m_frame(self.game, image))
+                else:
+                    self.stream.write(to_rgb(self.game, image))
+            self.stream.flush()
+        # Hand any error (e.g. a closed pipe or Pillow missing for Y4M) to the simulation thread.
+        except Exception as error:
+            self.error = error
+
+            # Keep emptying the queue so that write() never blocks forever.
+            while self.frames.get() is not END_OF_STREAM:
+                pass
+
+    # Queue the current generation. Blocks while the pipe is max_frames frames behind.
+    def write(self, image=None) -> None:
+        if self.error is not None:
+            self.error_reported = True
+            raise self.error
+        self.frames.put(self.game.image if image is None else image)
+
+    # Write every queued frame and stop the writer thread.
+    def close(self) -> None:
+        self.frames.put(END_OF_STREAM)
+        self.writer.join()
+        if self.error is not None and not self.error_reported:
+            self.error_reported = True
+            raise self.error
+
+# Play generations of a game and stream each one to a binary stream, starting with the current generation.
+def stream_frames(game: game_of_life.GameOfLife, stream, generations: int, format: str='rgb', fps: int=30, max_frames: int=4) -> None:
+    pipe = FramePipe(game, stream, format, fps, max_frames)
+    try:
+        pipe.write()
+        for _ in range(generations):
+            game.tick()
+            pipe.write()
+    finally:
+        pipe.close()
@@ -1,5 +1,9 @@
+import hashlib
+import copy
 import math
 
+import engines
+
 # Coordinates to get neighbours.
 PIXEL_OFFSETS = [(-1, 1), (0,  1), (1,  1),
                  (-1, 0),          (1,  0),
@@ -122,6 +126,19 @@ def invert_byte(byte: int) -> int:
     # Must be masked with 255 to cancel out any inverted sign bits.
     return ~byte & 0xff
 
+# Build a plane mask that selects the same bits in every colour channel.
+# e.g. channel_plane_mask([6, 7], 3) selects the two most significant bits of R, G and B.
+def channel_plane_mask(channel_bits, byte_depth: int) -> int:
+    byte_mask = 0
+    for bit in channel_bits:
+        if bit < 0 or bit >= 8:
+            raise ValueError('channel bits must be between 0 and 7')
+        byte_mask |= 1 << bit
+    return concat_bits([byte_mask] * byte_depth)
+
+# Lookup table version of invert_byte() for inverting whole byte strings with bytes.translate().
+INVERT_TABLE = bytes(invert_byte(n) for n in range(256))
+
 def split_rulestring(rulestring: str) -> tuple[str, str]:
     if '/' not in rulestring:
         return '', ''
@@ -129,12 +146,40 @@ def split_rulestring(rulestring: str) -> tuple[str, str]:
     B, S = rulestring.split('/')
     return B[1:], S[1:]
 
+# Write a bitmap file from pixel bytes in file order (bottom row first) without row padding.
+# Used to make test and sample images.
+def write_bitmap(filename: str, width: int, height: int, bit_depth: int, pixels: bytes) -> None:
+    row_length = width * bit_depth // 8
+    row_size = math.ceil(bit_depth * width / 32) * 4
+    header = bytearray(IMAGE_OFFSET)
+    header[0x00:0x02] = b'BM'
+    header[0x02:0x06] = (IMAGE_OFFSET + row_size * height).to_bytes(4, byteorder='little')
+    header[0x0a:0x0e] = IMAGE_OFFSET.to_bytes(4, byteorder='little')
+    header[0x0e:0x12] = (IMAGE_OFFSET - 0x0e).to_bytes(4, byteorder='little')
+    header[SIZE_OFFSET:SIZE_OFFSET + 4] = width.to_bytes(4, byteorder='little')
+    header[SIZE_OFFSET + 4:SIZE_OFFSET + 8] = height.to_bytes(4, byteorder='little')
+    header[0x1a:0x1c] = (1).to_bytes(2, byteorder='little')
+    header[DEPTH_OFFSET:DEPTH_OFFSET + 2] = bit_depth.to_bytes(2, byteorder='little')
+
+    with open(filename, 'wb') as bmp:
+        bmp.write(header)
+        for y in range(height):
+            bmp.write(pixels[y * row_length:(y + 1) * row_length])
+            bmp.write(bytes(row_size - row_length))
+
 class GameOfLife:
-    def __init__(self, filename: str, rulestring: str=RULESTRINGS['Default']) -> None:
+    def __init__(self, filename: str, rulestring: str=RULESTRINGS['Default'], is_reversed: bool=True, planes: int | None=None, engine: str | None=None, engine_params: dict | None=None) -> None:
+        self.filename = filename
+        self.rulestring = rulestring
+        self.is_reversed = is_reversed
+
         # Get birth and survival values from rulestring.
         B_str, S_str = split_rulestring(rulestring)
-        self.B = map(int, B_str)
-        self.S = map(int, S_str)
+        self.birth_values = set(map(int, B_str))
+        self.survival_values = set(map(int, S_str))
+
+        # Number of ticks played since the image was read from the file.
+        self.generation = 0
 
         # Get bitmap information from file.
         with open(filename, 'rb') as bmp:
@@ -174,6 +219,41 @@ class GameOfLife:
                 for x in range(self.width):
                     self.image.extend(map(invert_byte, bmp.read(self.byte_depth)))
 
+            # Hash the file contents that were just read so that checkpoints of this
+            # game are never mixed up with those of an edited version of the file.
+            bmp.seek(0)
+            sha = hashlib.sha256()
+            for chunk in iter(lambda: bmp.read(1 << 16), b''):
+                sha.update(chunk)
+            self.source_hash = sha.hexdigest()
+
+        # Keep generation 0 around so that the game can be rewound.
+        self.initial_image = tuple(self.image)
+
+        # Bit planes the Game of Life is played on. Default to every plane.
+        self.set_planes(planes)
+
+        # Pick the engine that computes each tick. If none is given the fastest
+        # engine for this machine and image is chosen by engines.choose_engine().
+        if engine is None:
+            self.engine = engines.choose_engine(self)
+        else:
+            self.engine = engines.create_engine(engine, **(engine_params or {}))
+
+    # Choose which bit planes are simulated. Bit z of the mask selects plane z,
+    # where plane 0 is the least significant bit of the last byte of a pixel.
+    # Unselected planes are frozen and passed through untouched.
+    def set_planes(self, planes: int | None) -> None:
+        full_mask = (1 << self.bit_depth) - 1
+        if planes is None:
+            planes = full_mask
+
+        if planes < 0 or planes > full_mask:
+            raise ValueError(f'plane mask must fit in {self.bit_depth} bits')
+
+        self.planes = planes
+        self.active_planes = [z for z in range(self.bit_depth) if planes >> z & 1]
+
     # Read one row of pixels given a y-level.
     # Used when padding the row to a multiple of 4 when writing back to a file.
     def get_row(self, y: int) -> int:
@@ -191,7 +271,7 @@ class GameOfLife:
     # Used for performing the game of life algorithm.
     def get_pixel(self, x: int, y: int) -> int:
         # Ensure that the coordinates lie within the bounds of the bitmap.
-        if x < 0 or x >= self.width or y < 0 or y >= self.width:
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
             return 0
 
         # Flatten 2D coordinates to 1D index.
@@ -205,7 +285,15 @@ class GameOfLife:
         return concat_bits(self.image[i + j] for j in range(self.byte_depth))
 
     def tick(self) -> None:
-        # Run one iteration of the Game of Life.
+        # Run one iteration of the Game of Life using the chosen engine.
+        # Nothing changes if every plane is frozen.
+        if self.active_planes:
+            self.engine.tick(self)
+        self.generation += 1
+
+    # The original pure Python Game of Life loop.
+    # Every other engine must produce exactly the same images as this one.
+    def reference_tick(self) -> None:
         # Takes approximately one second to run with recommended file size.
 
         # Compute mask for checking one layer of neighbours.
@@ -224,11 +312,11 @@ class GameOfLife:
                 cells = (self.get_pixel(x + offset[0], y + offset[1]) for offset in PIXEL_OFFSETS)
                 neighbours = concat_bits(cells, shift_by=self.bit_depth)
 
-                # Copy the mask from the constant as to not mutate the original variable.
-                mask = NEIGHBOUR_Z_MASK
+                # Iterate through the selected bit planes and play the Game of Life.
+                for z in self.active_planes:
+                    # Shift the mask to the plane being played.
+                    mask = NEIGHBOUR_Z_MASK << z
 
-                # Iterate through bit depth and play the Game of Life.
-                for z in range(self.bit_depth):
                     # Get number of alive neighbours.
                     alive = (neighbours & mask).bit_count()
 
@@ -245,9 +333,6 @@ class GameOfLife:
                         # Rebirth bit at index.
                         pixel |= mask & (1 << self.bit_depth) - 1
 
-                    # Shift the mask by 1 to indicate next file depth.
-                    mask <<= 1
-
                 # Append each colour from the pixel back to the list.
                 for i in range(self.bit_depth - 8, -1, -8):
                     new_image.append((pixel >> i) & 0xff)
@@ -255,24 +340,83 @@ class GameOfLife:
         # Update current image.
         self.image = tuple(new_image)
 
-    # Save the current generation to a new file.
-    def save_as(self, filename: str) -> None:  
-        # Save the current BMP under a file name.
+    # Copy the top left corner of the game into a smaller game.
+    # Used to calibrate and check engines on a sample of the real image.
+    def crop(self, width: int, height: int, engine: str=engines.REFERENCE_ENGINE, engine_params: dict | None=None) -> 'GameOfLife':
+        width, height = min(width, self.width), min(height, self.height)
+        cropped = copy.copy(self)
+
+        # Copy each row of the corner into the new image.
+        row_length = self.width * self.byte_depth
+        image = []
+        for y in range(height):
+            i = y * row_length
+            image.extend(self.image[i:i + width * self.byte_depth])
+
+        cropped.width, cropped.height = width, height
+        cropped.row_size = math.ceil(self.bit_depth * width / 32) * 4
+        cropped.image = tuple(image)
+        cropped.initial_image = cropped.image
+        cropped.source_hash = hashlib.sha256(f'{self.source_hash}:{width}x{height}'.encode()).hexdigest()
+        cropped.generation = 0
+
+        # Patch the header so that the cropped game can still be saved.
+        header = bytearray(self.header)
+        header[0x02:0x06] = (IMAGE_OFFSET + cropped.row_size * height).to_bytes(4, byteorder='little')
+        header[SIZE_OFFSET:SIZE_OFFSET + 4] = width.to_bytes(4, byteorder='little')
+        header[SIZE_OFFSET + 4:SIZE_OFFSET + 8] = height.to_bytes(4, byteorder='little')
+        cropped.header = bytes(header)
+
+        cropped.engine = engines.create_engine(engine, **(engine_params or {}))
+        return cropped
+
+    # Jump to a given generation, resuming from the nearest checkpoint in the
+    # cache (if one is given) instead of always re-simulating from generation 0.
+    def advance_to(self, generation: int, cache=None) -> None:
+        if generation < 0:
+            raise ValueError('generation must be positive')
+
+        # Going backwards means starting over from the source image.
+        if generation < self.generation:
+            self.image = self.initial_image
+            self.generation = 0
+
+        # Skip ahead to a cached checkpoint if it is closer than where we are now.
+        if cache is not None:
+            checkpoint = cache.load(self, generation)
+            if checkpoint is not None and checkpoint[0] > self.generation:
+                self.generation, self.image = checkpoint
+
+        # Compute the remaining generations, saving checkpoints along the way.
+        while self.generation < generation:
+            self.tick()
+            if cache is not None:
+                cache.store(self)
+
+    # Get the pixel bytes of the current generation (or another image of the same size)
+    # in file order without the row padding, inverted back if the black/white reverse flag is True.
+    def pixel_bytes(self, image=None) -> bytes:
+        if image is None:
+            image = self.image
+
+        if self.is_reversed:
+            return bytes(image).translate(INVERT_TABLE)
+        return bytes(image)
+
+    # Get the current generation (or another image of the same size) as the bytes of a BMP file.
+    def bitmap_bytes(self, image=None) -> bytes:
+        data = self.pixel_bytes(image)
+
+        # Put the row padding back.
+        row_length = self.width * self.byte_depth
+        padding = bytes(self.row_size - row_length)
+        rows = (data[y * row_length:(y + 1) * row_length] + padding for y in range(self.height))
+        return self.header + b''.join(rows)
+
+    # Save the current generation (or another image of the same size) to a new file.
+    def save_as(self, filename: str, image=None) -> None:
         with open(filename, 'wb') as bmp:
-            bmp.write(self.header)
-            for y in range(self.height):
-                row = self.get_row(y)
-
-                # Invert each bit again if black/white reverse flag is True.
-                if self.is_reversed:
-                    # Flip all the bits back into its original state so that all 
-                    # logical ones become white pixels.
-                    bmp.write(bytes(map(invert_byte, row)))
-                else:
-                    bmp.write(bytes(row))
-
-                # Account for padding.
-                bmp.write(bytes([0] * (self.row_size - len(row))))
+            bmp.write(self.bitmap_bytes(image))
 
 if __name__ == '__main__':
     bmp = GameOfLife('Conways_game_of_life_breeder_animation.bmp')
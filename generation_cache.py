@@ -0,0 +1,100 @@
+import hashlib
+import zlib
+import os
+
+# Default location for cached generations, next to the rest of the program.
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.dirname(__file__), 'cache')
+
+# File extension used for a single compressed checkpoint.
+CHECKPOINT_EXTENSION = '.gen'
+
+# Stores compressed checkpoints of a Game of Life on disk.
+# Checkpoints are keyed by (source bitmap hash, rulestring and plane mask, generation) and laid out as
+#   <directory>/<source hash>/<rule hash>/<generation>.gen
+# The least recently used checkpoints are evicted once the cache grows over max_size bytes.
+class GenerationCache:
+    def __init__(self, directory: str=DEFAULT_CACHE_DIRECTORY, interval: int=100, max_size: int=256 * 2**20, level: int=6) -> None:
+        if interval < 1:
+            raise ValueError('interval must be at least 1')
+
+        self.directory = directory
+        self.interval = interval
+        self.max_size = max_size
+        self.level = level
+
+    # Get the folder holding every checkpoint for one bitmap, rulestring and plane mask.
+    # Bitmaps are told apart by the hash of their contents when the game loaded them, so
+    # renamed or copied bitmaps share checkpoints and an edited bitmap never reuses stale ones.
+    def get_folder(self, game) -> str:
+        # Rulestrings contain a slash so they can't be used directly as a folder name.
+        # Frozen planes change every later generation so they are part of the key too.
+        rule_hash = hashlib.sha256(f'{game.rulestring}:{game.planes:x}'.encode()).hexdigest()[:16]
+        return os.path.join(self.directory, game.source_hash, rule_hash)
+
+    # Save the current generation of a game if it lands on the checkpoint interval.
+    def store(self, game) -> None:
+        if game.generation == 0 or game.generation % self.interval != 0:
+            return
+
+        folder = self.get_folder(game)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f'{game.generation}{CHECKPOINT_EXTENSION}')
+
+        # Write to a temporary file first so that a crash never leaves a half written checkpoint.
+        with open(path + '.tmp', 'wb') as checkpoint:
+            checkpoint.write(zlib.compress(bytes(game.image), self.level))
+        os.replace(path + '.tmp', path)
+
+        self.evict()
+
+    # Load the closest checkpoint at or before a generation.
+    # Returns a (generation, image) tuple, or None if nothing useful is cached.
+    def load(self, game, generation: int) -> tuple[int, tuple] | None:
+        folder = self.get_folder(game)
+        if not os.path.isdir(folder):
+            return None
+
+        # Find the latest cached generation that doesn't overshoot the target.
+        cached = [int(name[:-len(CHECKPOINT_EXTENSION)]) for name in os.listdir(folder) if name.endswith(CHECKPOINT_EXTENSION)]
+        cached = [n for n in cached if n <= generation]
+        if not cached:
+            return None
+
+        nearest = max(cached)
+        path = os.path.join(folder, f'{nearest}{CHECKPOINT_EXTENSION}')
+        try:
+            with open(path, 'rb') as checkpoint:
+                image = zlib.decompress(checkpoint.read())
+        except (OSError, zlib.error):
+            return None
+
+        # Ignore checkpoints that don't fit the bitmap (e.g. a hash collision or corruption).
+        if len(image) != game.width * game.height * game.byte_depth:
+            return None
+
+        # Mark the checkpoint as recently used.
+        os.utime(path)
+        return nearest, tuple(image)
+
+    # Remove the least recently used checkpoints until the cache fits in max_size bytes.
+    def evict(self) -> None:
+        checkpoints = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(CHECKPOINT_EXTENSION):
+                    stat = os.stat(os.path.join(root, name))
+                    checkpoints.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+
+        total = sum(size for _, size, _ in checkpoints)
+        for _, size, path in sorted(checkpoints):
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= size
+
+    # Delete every checkpoint in the cache.
+    def clear(self) -> None:
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(CHECKPOINT_EXTENSION):
+                    os.remove(os.path.join(root, name))
@@ -13,6 +13,8 @@ class InfoMenu(ctk.CTkTabview):
         # Info variables.
         self.generations = ctk.StringVar()
         self.secs_per_generation = ctk.StringVar()
+        self.computed_rate = ctk.StringVar()
+        self.displayed_rate = ctk.StringVar()
         self.rulestring = ctk.StringVar()
         self.rulestring_type = ctk.StringVar()
         self.file_name = ctk.StringVar()
@@ -20,6 +22,7 @@ class InfoMenu(ctk.CTkTabview):
         # Update info variables.
         self.update_generations(0)
         self.update_gen_load_time(0)
+        self.update_rates(0, 0)
         self.update_rulestring(RULESTRINGS['Default'])
 
         # Widgets.
@@ -31,6 +34,13 @@ class InfoMenu(ctk.CTkTabview):
     def update_gen_load_time(self, secs_per_generation: int) -> None:
         self.secs_per_generation.set(f'Generation load time: {secs_per_generation}s')
 
+    # Generations are computed and drawn separately, so report both rates.
+    def update_rates(self, computed_per_sec: float, displayed_per_sec: float) -> None:
+        self.computed_rate.set(f'Generations computed: {computed_per_sec:.1f}/s')
+        self.displayed_rate.set(f'Generations displayed: {displayed_per_sec:.1f}/s')
+        if computed_per_sec:
+            self.update_gen_load_time(round(1 / computed_per_sec, 3))
+
     def update_rulestring(self, rulestring: str) -> None:
         rulestr_type = INV_RULESTRINGS.get(rulestring, 'Custom')
         self.rulestring.set(f'Rulestring: {rulestring} ({rulestr_type})')
@@ -45,8 +55,12 @@ class InfoMenu(ctk.CTkTabview):
         label2 = ctk.CTkLabel(info_frame, textvariable=self.secs_per_generation)
         label3 = ctk.CTkLabel(info_frame, textvariable=self.rulestring)
         label4 = ctk.CTkLabel(info_frame, textvariable=self.file_name)
+        label5 = ctk.CTkLabel(info_frame, textvariable=self.computed_rate)
+        label6 = ctk.CTkLabel(info_frame, textvariable=self.displayed_rate)
         info_frame.pack(expand=True, fill='both')
         label1.pack(fill='both', padx=3, pady=8)
         label2.pack(fill='both', padx=3, pady=8)
+        label5.pack(fill='both', padx=3, pady=8)
+        label6.pack(fill='both', padx=3, pady=8)
         label3.pack(fill='both', padx=3, pady=8)
         label4.pack(fill='both', padx=3, pady=8)
@@ -0,0 +1,179 @@
+# Publish the current generation of a Game of Life in shared memory so that other
+# processes on the same machine (recorders, analysers, dashboards...) can read it
+# without the simulation writing a file. Readers never block the writer, so any
+# number of them can read at no extra cost to the simulation.
+#
+# The segment holds a header followed by a small ring of frame slots:
+#   header: magic, writer pid, sequence, width, height, byte_depth, slot count
+#   slot:   generation (8 bytes) followed by the pixel bytes of one frame
+# Frame n (counting from 1) is written into slot (n - 1) % slots and only then is the
+# sequence set to n. A reader can use a frame in place until the writer comes back
+# around to its slot, which is checked with FrameReader.is_valid().
+#
+# Pixels are in the same order as in the bitmap file (bottom row first, BGR) with
+# the row padding removed, and black and white are no longer inverted.
+
+# Python modules.
+from multiprocessing import resource_tracker, shared_memory
+import struct
+import os
+
+# Personal modules.
+import game_of_life
+
+DEFAULT_NAME = 'game_of_life_frames'
+MAGIC = b'GOLF'
+
+# Magic, writer pid, sequence, width, height, byte depth, slot count.
+# The sequence is 8-byte aligned so that it is written in one store and readers never see half of it.
+HEADER = struct.Struct('<4sIQIIII')
+HEADER_SIZE = 32
+SEQUENCE_OFFSET = 8
+
+# Generation number stored in front of every slot.
+GENERATION = struct.Struct('<Q')
+
+# Names of the segments published by this process.
+PUBLISHED_NAMES = set()
+
+def get_frame_size(width: int, height: int, byte_depth: int) -> int:
+    return width * height * byte_depth
+
+def get_slot_offset(slot: int, frame_size: int) -> int:
+    return HEADER_SIZE + slot * (GENERATION.size + frame_size)
+
+# Open an existing segment without letting the resource tracker remove it when this process exits.
+def attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attached segment is tracked and unlinked when the process exits.
+        memory = shared_memory.SharedMemory(name=name)
+        if name not in PUBLISHED_NAMES:
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        return memory
+
+# Check whether a segment was left behind by a publisher that is no longer running.
+# Only POSIX keeps segments around after every process using them has gone.
+def is_stale(name: str) -> bool:
+    if os.name != 'posix':
+        return False
+
+    memory = attach(name)
+    try:
+        if memory.size < HEADER_SIZE:
+            return False
+        magic, pid = HEADER.unpack_from(memory.buf, 0)[:2]
+    finally:
+        memory.close()
+    if magic != MAGIC:
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+# Writes frames of one game into a shared memory segment.
+class FramePublisher:
+    def __init__(self, game: game_of_life.GameOfLife, name: str=DEFAULT_NAME, slots: int=3) -> None:
+        if slots < 2:
+            raise ValueError('at least two slots are needed to read frames in place')
+
+        self.width, self.height, self.byte_depth = game.width, game.height, game.byte_depth
+        self.frame_size = get_frame_size(game.width, game.height, game.byte_depth)
+        self.slots = slots
+        self.sequence = 0
+
+        # Only replace a segment left behind by a run that crashed, never one that is still published.
+        size = get_slot_offset(slots, self.frame_size)
+        try:
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            if not is_stale(name):
+                raise FileExistsError(f'shared memory segment {name!r} is already in use, choose another name') from None
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        HEADER.pack_into(self.memory.buf, 0, MAGIC, os.getpid(), 0, self.width, self.height, self.byte_depth, slots)
+        PUBLISHED_NAMES.add(name)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    # Publish the current generation of the game.
+    def publish(self, game: game_of_life.GameOfLife, image=None) -> None:
+        if image is None:
+            image = game.image
+
+        slot = self.sequence % self.slots
+        offset = get_slot_offset(slot, self.frame_size)
+
+        # Fill the slot first and only then make it visible by bumping the sequence.
+        GENERATION.pack_into(self.memory.buf, offset, game.generation)
+        self.memory.buf[offset + GENERATION.size:offset + GENERATION.size + self.frame_size] = game.pixel_bytes(image)
+        self.sequence += 1
+        struct.pack_into('<Q', self.memory.buf, SEQUENCE_OFFSET, self.sequence)
+
+    # Remove the segment. Readers that are still attached keep their mapping until they close.
+    def close(self) -> None:
+        PUBLISHED_NAMES.discard(self.name)
+        self.memory.close()
+        self.memory.unlink()
+
+# Reads frames published by a FramePublisher, possibly from another process.
+class FrameReader:
+    def __init__(self, name: str=DEFAULT_NAME) -> None:
+        self.memory = attach(name)
+
+        magic, _, _, self.width, self.height, self.byte_depth, self.slots = HEADER.unpack_from(self.memory.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{name} is not a Game of Life frame segment')
+        self.frame_size = get_frame_size(self.width, self.height, self.byte_depth)
+
+    # Sequence number of the newest published frame, 0 if nothing was published yet.
+    def get_sequence(self) -> int:
+        return struct.unpack_from('<Q', self.memory.buf, SEQUENCE_OFFSET)[0]
+
+    # Get the newest frame without copying it.
+    # Returns a (sequence, generation, memoryview) tuple, or None if nothing was published yet.
+    # The memoryview is only guaranteed to hold that frame while is_valid(sequence) is True,
+    # so check it after using the pixels.
+    def latest(self) -> tuple[int, int, memoryview] | None:
+        sequence = self.get_sequence()
+        if sequence == 0:
+            return None
+
+        offset = get_slot_offset((sequence - 1) % self.slots, self.frame_size)
+        generation = GENERATION.unpack_from(self.memory.buf, offset)[0]
+        pixels = self.memory.buf[offset + GENERATION.size:offset + GENERATION.size + self.frame_size]
+        return sequence, generation, pixels
+
+    # Check that the frame with this sequence number hasn't been overwritten.
+    # The writer only starts reusing its slot after slots - 1 newer frames are published.
+    def is_valid(self, sequence: int) -> bool:
+        return self.get_sequence() - sequence <= self.slots - 2
+
+    # Copy the newest frame. Returns a (generation, bytes) tuple, or None if nothing was published yet.
+    def read(self) -> tuple[int, bytes] | None:
+        while True:
+            frame = self.latest()
+            if frame is None:
+                return None
+
+            sequence, generation, pixels = frame
+            data = bytes(pixels)
+            pixels.release()
+
+            # Try again if the writer lapped us while copying.
+            if self.is_valid(sequence):
+                return generation, data
+
+    def close(self) -> None:
+        self.memory.close()
@@ -0,0 +1,36 @@
+# Shared fixtures for the tests: a temporary directory with seeded random bitmaps in it.
+import os
+import random
+import tempfile
+import unittest
+
+import game_of_life
+
+# Get the pixel bytes of a random image. The same seed always gives the same pixels.
+def random_pixels(width: int, height: int, bit_depth: int, seed=0) -> bytes:
+    rng = random.Random(seed)
+    return bytes(rng.getrandbits(8) for _ in range(width * height * bit_depth // 8))
+
+class BitmapTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def get_path(self, *names: str) -> str:
+        return os.path.join(self.directory.name, *names)
+
+    # Write a bitmap into the temporary directory and return its path.
+    # The pixels are random unless given.
+    def write_bitmap(self, path: str, width: int, height: int, bit_depth: int, pixels: bytes | None=None, seed=0) -> str:
+        filename = self.get_path(path)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        if pixels is None:
+            pixels = random_pixels(width, height, bit_depth, seed)
+        game_of_life.write_bitmap(filename, width, height, bit_depth, pixels)
+        return filename
+
+    # Write a bitmap and load it as a game. Extra keyword arguments go to GameOfLife.
+    def make_game(self, width: int, height: int, bit_depth: int, pixels: bytes | None=None, seed=0, path: str='input.bmp', **kwargs) -> game_of_life.GameOfLife:
+        return game_of_life.GameOfLife(self.write_bitmap(path, width, height, bit_depth, pixels, seed), **kwargs)
@@ -0,0 +1,52 @@
+import csv
+import multiprocessing
+import os
+import unittest
+from unittest import mock
+
+import batch
+from helpers import BitmapTestCase
+
+process_file = batch.process_file
+
+# Kill the worker process on z-crash.bmp, as if it ran out of memory.
+# Files of the same size start in reverse name order, so it is started first.
+def crash_or_process(filename: str, *args) -> dict:
+    if os.path.basename(filename) == 'z-crash.bmp':
+        os._exit(1)
+    return process_file(filename, *args)
+
+class TestBatch(BitmapTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.input_dir = self.get_path('input')
+        self.output_dir = self.get_path('output')
+
+    # Write a random input bitmap, with different pixels for every path.
+    def write_input(self, path: str) -> str:
+        return self.write_bitmap(os.path.join('input', path), 12, 9, 24, seed=path)
+
+    def test_duplicate_names_are_rejected(self) -> None:
+        self.write_input('a/same.bmp')
+        self.write_input('b/same.bmp')
+        with self.assertRaises(ValueError):
+            batch.run_batch(os.path.join(self.input_dir, '*', '*.bmp'), self.output_dir, generations=2, workers=1)
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', 'the patched worker function is only inherited by forked workers')
+    def test_crashed_worker_is_reported(self) -> None:
+        for name in ('z-crash.bmp', 'first.bmp', 'second.bmp', 'third.bmp'):
+            self.write_input(name)
+
+        # The healthy files in progress next to the crash are tried again, not failed.
+        with mock.patch('batch.process_file', crash_or_process):
+            results = batch.run_batch(self.input_dir, self.output_dir, generations=2, workers=3)
+        self.assertEqual(len(results), 4)
+
+        report = os.path.join(self.output_dir, 'report.csv')
+        batch.write_report(results, report)
+        with open(report, newline='') as file:
+            statuses = {os.path.basename(row['filename']): row['status'] for row in csv.DictReader(file)}
+        self.assertEqual(statuses, {'z-crash.bmp': 'failed', 'first.bmp': 'ok', 'second.bmp': 'ok', 'third.bmp': 'ok'})
+
+if __name__ == '__main__':
+    unittest.main()
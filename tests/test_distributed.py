@@ -0,0 +1,81 @@
+import secrets
+import unittest
+
+import distributed
+import game_of_life
+from helpers import BitmapTestCase
+
+class TestDistributed(BitmapTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.authkey = secrets.token_bytes(16)
+        self.processes = []
+
+    def tearDown(self) -> None:
+        for process in self.processes:
+            process.terminate()
+        super().tearDown()
+
+    # Get the same random image as a game to play in one process and one to play on workers.
+    def make_games(self, width: int, height: int, bit_depth: int) -> tuple:
+        filename = self.write_bitmap('input.bmp', width, height, bit_depth)
+        return (game_of_life.GameOfLife(filename, 'B36/S23', engine='bitplane'),
+                game_of_life.GameOfLife(filename, 'B36/S23', engine='reference'))
+
+    def start_workers(self, count: int) -> list:
+        addresses, self.processes = distributed.start_local_workers(count, self.authkey)
+        return addresses
+
+    def test_matches_single_process(self) -> None:
+        expected, game = self.make_games(30, 21, 24)
+        coordinator = distributed.Coordinator(game, self.start_workers(3), self.authkey, weights=[1, 3, 1])
+        coordinator.run(6)
+        coordinator.snapshot()
+        coordinator.close()
+        expected.advance_to(6)
+        self.assertEqual(bytes(game.image), bytes(expected.image))
+
+    def test_wide_halos(self) -> None:
+        # Halos of a few hundred KB each, swapped between four single row bands.
+        expected, game = self.make_games(60000, 4, 32)
+        coordinator = distributed.Coordinator(game, self.start_workers(4), self.authkey)
+        coordinator.run(2)
+        coordinator.snapshot()
+        coordinator.close()
+        expected.advance_to(2)
+        self.assertEqual(bytes(game.image), bytes(expected.image))
+
+    def test_workers_outlive_a_dropped_coordinator(self) -> None:
+        expected, game = self.make_games(30, 21, 24)
+        addresses = self.start_workers(3)
+
+        # Go away in the middle of a run without saying stop, as after a Ctrl-C.
+        coordinator = distributed.Coordinator(game, addresses, self.authkey)
+        coordinator.run(2)
+        for conn in coordinator.connections:
+            conn.close()
+        self.assertTrue(all(process.is_alive() for process in self.processes))
+
+        _, game = self.make_games(30, 21, 24)
+        coordinator = distributed.Coordinator(game, addresses, self.authkey)
+        coordinator.run(4)
+        coordinator.snapshot()
+        coordinator.close()
+        expected.advance_to(4)
+        self.assertEqual(bytes(game.image), bytes(expected.image))
+        self.assertTrue(all(process.is_alive() for process in self.processes))
+
+    def test_rebalance_on_local_workers(self) -> None:
+        expected, game = self.make_games(30, 21, 24)
+        coordinator = distributed.Coordinator(game, self.start_workers(2), self.authkey)
+        coordinator.run(3)
+        coordinator.rebalance()
+        coordinator.run(3)
+        coordinator.snapshot()
+        self.assertEqual(len(coordinator.report()), 2)
+        coordinator.close()
+        expected.advance_to(6)
+        self.assertEqual(bytes(game.image), bytes(expected.image))
+
+if __name__ == '__main__':
+    unittest.main()
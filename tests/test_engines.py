@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+
+import engines
+import game_of_life
+from helpers import BitmapTestCase
+
+# A few rules with different behaviour, including births with no neighbours (B0).
+RULESTRINGS = ('B3/S23', 'B36/S23', 'B0123478/S34678', 'B2/S', 'B1357/S1357')
+
+# Engine that doesn't change the image. Must never pass the differential check.
+class NoopEngine(engines.Engine):
+    name = 'test-noop'
+
+    def tick(self, game) -> None:
+        pass
+
+# Engine that plays every plane, ignoring the plane mask.
+class EveryPlaneEngine(engines.BitplaneEngine):
+    name = 'test-every-plane'
+
+    def tick(self, game) -> None:
+        planes = game.planes
+        game.set_planes(None)
+        try:
+            super().tick(game)
+        finally:
+            game.set_planes(planes)
+
+class TestCheckEngine(unittest.TestCase):
+    def setUp(self) -> None:
+        for cls in (NoopEngine, EveryPlaneEngine):
+            engines.register_engine(cls)
+
+    def tearDown(self) -> None:
+        for cls in (NoopEngine, EveryPlaneEngine):
+            del engines.ENGINES[cls.name]
+
+    def test_noop_engine_fails(self) -> None:
+        for rulestring in RULESTRINGS:
+            self.assertFalse(engines.check_engine(NoopEngine.name, rulestring))
+
+    def test_ignoring_plane_mask_fails(self) -> None:
+        self.assertFalse(engines.check_engine(EveryPlaneEngine.name, 'B3/S23'))
+
+    def test_check_games_are_repeatable(self) -> None:
+        first = engines.get_check_games('B3/S23', 1, 2)
+        engines.get_check_games.cache_clear()
+        second = engines.get_check_games('B3/S23', 1, 2)
+        self.assertEqual([images for _, images in first], [images for _, images in second])
+
+class TestEngines(unittest.TestCase):
+    def test_registered_engines_match_reference(self) -> None:
+        for rulestring in RULESTRINGS:
+            game = engines.get_check_games(rulestring, 0, engines.CHECK_GENERATIONS)[0][0]
+            for name, cls in engines.ENGINES.items():
+                for params in cls.candidates(game) or [{}]:
+                    with self.subTest(engine=name, params=params, rulestring=rulestring):
+                        self.assertTrue(engines.check_engine(name, rulestring, params))
+
+    def test_parallel_tiles_match_reference(self) -> None:
+        for tile_rows in (1, 4, 64):
+            with self.subTest(tile_rows=tile_rows):
+                self.assertTrue(engines.check_engine('parallel-bitplane', 'B36/S23', {'workers': 2, 'tile_rows': tile_rows}))
+
+    def test_other_seeds_match_reference(self) -> None:
+        for seed in (1, 2):
+            for name in ('bitplane', 'incremental'):
+                with self.subTest(engine=name, seed=seed):
+                    self.assertTrue(engines.check_engine(name, 'B3/S23', seed=seed, generations=12))
+
+class TestCalibration(BitmapTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.game = self.make_game(16, 1000, 8, engine=engines.REFERENCE_ENGINE)
+
+    def test_parallel_candidates_fit_the_sample(self) -> None:
+        sample = engines.get_calibration_sample(self.game)
+        with mock.patch('os.cpu_count', return_value=8):
+            candidates = engines.ParallelBitplaneEngine.candidates(sample)
+
+        self.assertEqual({params['workers'] for params in candidates}, {4, 8})
+        for params in candidates:
+            # Every candidate splits the timed sample over several tiles.
+            self.assertLess(params['tile_rows'], sample.height)
+
+    def test_tuning_key_matches_the_sample(self) -> None:
+        sample = engines.get_calibration_sample(self.game)
+        self.assertEqual(engines.get_tuning_key(self.game), engines.get_tuning_key(sample))
+
+if __name__ == '__main__':
+    unittest.main()
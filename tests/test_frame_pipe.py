@@ -0,0 +1,39 @@
+import io
+import sys
+import unittest
+from unittest import mock
+
+import frame_pipe
+from helpers import BitmapTestCase
+
+class TestFramePipe(BitmapTestCase):
+    def test_rgb_frames_are_top_down(self) -> None:
+        # Bottom row blue, top row red, stored bottom row first as BGR.
+        game = self.make_game(1, 2, 24, bytes((255, 0, 0, 0, 0, 255)), engine='reference')
+        stream = io.BytesIO()
+        frame_pipe.stream_frames(game, stream, 0)
+        self.assertEqual(stream.getvalue(), bytes((255, 0, 0, 0, 0, 255)))
+
+    def test_y4m_header_is_full_range(self) -> None:
+        game = self.make_game(3, 2, 8, bytes(6), engine='reference')
+        self.assertIn(b' XCOLORRANGE=FULL\n', frame_pipe.get_y4m_header(game, 30))
+
+    def test_16_bit_is_rejected(self) -> None:
+        game = self.make_game(4, 2, 16, bytes(16), engine='reference')
+        with self.assertRaises(ValueError):
+            frame_pipe.FramePipe(game, io.BytesIO())
+
+    def test_colour_y4m_needs_pillow(self) -> None:
+        game = self.make_game(2, 2, 24, bytes(12), engine='reference')
+        stream = io.BytesIO()
+        with mock.patch.dict(sys.modules, {'PIL': None, 'PIL.Image': None}):
+            with self.assertRaises(ValueError):
+                frame_pipe.FramePipe(game, stream, 'y4m')
+
+            # Grayscale frames don't go through Pillow.
+            game = self.make_game(2, 2, 8, bytes(4), engine='reference')
+            frame_pipe.stream_frames(game, stream, 1, 'y4m')
+        self.assertTrue(stream.getvalue().startswith(b'YUV4MPEG2 W2 H2'))
+
+if __name__ == '__main__':
+    unittest.main()
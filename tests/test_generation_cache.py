@@ -0,0 +1,51 @@
+import unittest
+
+import game_of_life
+from generation_cache import GenerationCache
+from helpers import BitmapTestCase
+
+class TestGenerationCache(BitmapTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache = GenerationCache(self.get_path('cache'), interval=2)
+        self.filename = self.write_random_bitmap(0)
+
+    def write_random_bitmap(self, seed: int) -> str:
+        return self.write_bitmap('input.bmp', 20, 15, 24, seed=seed)
+
+    def new_game(self) -> game_of_life.GameOfLife:
+        return game_of_life.GameOfLife(self.filename, engine='bitplane')
+
+    def test_resume_matches_full_run(self) -> None:
+        expected = self.new_game()
+        expected.advance_to(5)
+
+        self.new_game().advance_to(4, self.cache)
+        game = self.new_game()
+        self.assertEqual(self.cache.load(game, 5)[0], 4)
+        game.advance_to(5, self.cache)
+        self.assertEqual(bytes(game.image), bytes(expected.image))
+
+    def test_edited_bitmap_gets_its_own_checkpoints(self) -> None:
+        original = self.new_game()
+        original.advance_to(4, self.cache)
+
+        # Edit the file while the same cache object stays alive.
+        self.write_random_bitmap(1)
+        edited = self.new_game()
+        self.assertNotEqual(self.cache.get_folder(edited), self.cache.get_folder(original))
+        edited.advance_to(4, self.cache)
+
+        # The original contents still resume from their own checkpoints.
+        self.write_random_bitmap(0)
+        game = self.new_game()
+        game.advance_to(4, self.cache)
+        self.assertEqual(bytes(game.image), bytes(original.image))
+
+    def test_eviction_keeps_size_under_limit(self) -> None:
+        self.cache.max_size = 1
+        self.new_game().advance_to(6, self.cache)
+        self.assertIsNone(self.cache.load(self.new_game(), 6))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+from multiprocessing import resource_tracker, shared_memory
+import os
+import subprocess
+import sys
+import unittest
+
+import shared_frame
+from helpers import BitmapTestCase
+
+class TestSharedFrame(BitmapTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.name = f'gol_test_{os.getpid()}'
+        self.game = self.make_game(5, 3, 24, engine='reference')
+
+    def test_read_published_frame(self) -> None:
+        publisher = shared_frame.FramePublisher(self.game, self.name)
+        reader = shared_frame.FrameReader(self.name)
+        try:
+            publisher.publish(self.game)
+            self.assertEqual(reader.read(), (0, self.game.pixel_bytes()))
+            self.assertEqual(shared_frame.SEQUENCE_OFFSET % 8, 0)
+        finally:
+            reader.close()
+            publisher.close()
+
+    def test_live_segment_is_not_replaced(self) -> None:
+        publisher = shared_frame.FramePublisher(self.game, self.name)
+        try:
+            with self.assertRaises(FileExistsError):
+                shared_frame.FramePublisher(self.game, self.name)
+            publisher.publish(self.game)
+        finally:
+            publisher.close()
+
+    @unittest.skipUnless(os.name == 'posix', 'segments only outlive their processes on POSIX')
+    def test_stale_segment_is_replaced(self) -> None:
+        # Leave a segment behind as if its publisher had crashed.
+        dead = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+        memory = shared_memory.SharedMemory(name=self.name, create=True, size=shared_frame.HEADER_SIZE)
+        resource_tracker.unregister(memory._name, 'shared_memory')
+        shared_frame.HEADER.pack_into(memory.buf, 0, shared_frame.MAGIC, int(dead.stdout), 0, 1, 1, 3, 2)
+        memory.close()
+
+        publisher = shared_frame.FramePublisher(self.game, self.name)
+        publisher.close()
+
+if __name__ == '__main__':
+    unittest.main()